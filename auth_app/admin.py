@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import RevokedToken
 
 # Register your models here.
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ['digest', 'user_id', 'expires_at', 'revoked_at']
+    search_fields = ['digest']
+    readonly_fields = ['revoked_at']
@@ -0,0 +1,144 @@
+import copy
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+
+from backend.lru_cache import LRUCache
+from .models import RevokedToken
+
+JWT_ALGORITHMS = ['HS256']
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenDenylist:
+    """
+    In-process copy of the unexpired RevokedToken digests. It is reloaded at
+    most every refresh_seconds, so checking a token never queries the database.
+    """
+
+    def __init__(self, refresh_seconds=30):
+        self.refresh_seconds = refresh_seconds
+        self._digests = frozenset()
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def __contains__(self, digest):
+        self.maybe_refresh()
+        return digest in self._digests
+
+    def maybe_refresh(self):
+        if time.monotonic() < self._next_refresh:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_refresh:
+                return  # Another thread refreshed while we waited
+            digests = RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('digest', flat=True)
+            self._digests = frozenset(digests)
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+
+    def add(self, digest):
+        self._digests = self._digests | {digest}
+
+
+_token_cache = None
+_denylist = None
+
+
+def get_token_cache():
+    """Decoded claims and User per token digest, shared by all requests of the process"""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = LRUCache(settings.JWT_CACHE_MAX_ENTRIES)
+    return _token_cache
+
+
+def get_denylist():
+    global _denylist
+    if _denylist is None:
+        _denylist = TokenDenylist(settings.JWT_DENYLIST_REFRESH_SECONDS)
+    return _denylist
+
+
+def decode_token(token, verify_exp=True):
+    try:
+        return jwt.decode(
+            token, settings.SECRET_KEY, algorithms=JWT_ALGORITHMS,
+            options={'require': ['exp', 'user_id'], 'verify_exp': verify_exp},
+        )
+    except jwt.ExpiredSignatureError:
+        raise exceptions.AuthenticationFailed('Token has expired')
+    except jwt.InvalidTokenError:
+        raise exceptions.AuthenticationFailed('Invalid token')
+
+
+def authenticate_token(token):
+    """
+    Return (user, claims) for a token issued by authentication.views.login.
+    After the first verification the pair is cached until the token expires
+    or JWT_CACHE_TTL_SECONDS pass, so the hot path is a hash and two lookups.
+    """
+    digest = token_digest(token)
+    if digest in get_denylist():
+        raise exceptions.AuthenticationFailed('Token has been revoked')
+
+    cache = get_token_cache()
+    cached = cache.get(digest)
+    if cached is None:
+        claims = decode_token(token)
+        user = User.objects.filter(pk=claims['user_id'], is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed('User not found or inactive')
+        cached = (user, claims)
+        # Never keep an entry past the token's own expiry
+        ttl = min(settings.JWT_CACHE_TTL_SECONDS, claims['exp'] - time.time())
+        if ttl > 0:
+            cache.set(digest, cached, ttl)
+
+    user, claims = cached
+    return copy.copy(user), claims  # Requests must not share one mutable User
+
+
+def revoke_token(token):
+    """Add a token to the denylist (used on logout) and drop it from the cache"""
+    claims = decode_token(token, verify_exp=False)
+    digest = token_digest(token)
+    expires_at = datetime.fromtimestamp(claims['exp'], tz=dt_timezone.utc)
+    try:
+        RevokedToken.objects.create(digest=digest, user_id=claims['user_id'], expires_at=expires_at)
+    except IntegrityError:
+        pass  # Already revoked
+    # Expired tokens are rejected anyway, so their entries can go
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    get_denylist().add(digest)
+    get_token_cache().delete(digest)
+
+
+class JWTAuthentication(authentication.BaseAuthentication):
+    """DRF authentication for 'Authorization: Bearer <token>' headers"""
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword:
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid Authorization header')
+        try:
+            token = header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token')
+        return authenticate_token(token)
+
+    def authenticate_header(self, request):
+        return 'Bearer'
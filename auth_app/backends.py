@@ -0,0 +1,43 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.db.models import CharField, Func
+
+
+class EmailKey(Func):
+    """
+    lower(nullif(email, '')) with the literal inlined (a bound parameter would
+    stop SQLite from matching the auth_user_email_lower_uniq index expression)
+    """
+    template = "LOWER(NULLIF(%(expressions)s, ''))"
+    output_field = CharField()
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def get_user_by_email(email):
+    """
+    Case-insensitive lookup by email in one query. The expression matches the
+    unique auth_user_email_lower_uniq index (auth_app migration 0002).
+    """
+    email = normalize_email(email)
+    if not email:
+        return None
+    return User.objects.annotate(email_key=EmailKey('email')).filter(email_key=email).first()
+
+
+class EmailBackend(ModelBackend):
+    """Authenticate with email + password, loading the user exactly once"""
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        user = get_user_by_email(email)
+        if user is None:
+            # Run the hasher anyway so unknown emails take as long as wrong passwords
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='SHA-256 of the token', max_length=64, unique=True)),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(help_text='Token expiry - the entry can be pruned after it')),
+                ('revoked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='revokedtoken_expires_idx')],
+            },
+        ),
+    ]
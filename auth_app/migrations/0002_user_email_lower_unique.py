@@ -0,0 +1,35 @@
+from django.db import migrations
+
+INDEX_NAME = 'auth_user_email_lower_uniq'
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """Fail with a readable message instead of an index build error"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT lower(email) FROM auth_user WHERE email <> '' "
+            "GROUP BY lower(email) HAVING COUNT(*) > 1"
+        )
+        duplicates = [row[0] for row in cursor.fetchall()]
+    if duplicates:
+        raise RuntimeError(
+            'Users share an email (case-insensitive), merge them before migrating: '
+            + ', '.join(duplicates[:20])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('auth_app', '0001_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # Blank emails become NULL, so users without one never collide
+        migrations.RunSQL(
+            f"CREATE UNIQUE INDEX {INDEX_NAME} ON auth_user (lower(nullif(email, '')))",
+            f"DROP INDEX {INDEX_NAME}",
+        ),
+    ]
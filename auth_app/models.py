@@ -1,3 +1,18 @@
 from django.db import models
 
 # Create your models here.
+
+class RevokedToken(models.Model):
+    """Denylist entry for a JWT revoked before it expires (e.g. on logout)"""
+    digest = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the token")
+    user_id = models.IntegerField(null=True, blank=True)
+    expires_at = models.DateTimeField(help_text="Token expiry - the entry can be pruned after it")
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Revoked token {self.digest[:12]}... (user {self.user_id})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='revokedtoken_expires_idx'),
+        ]
@@ -1,3 +1,124 @@
+from datetime import datetime, timedelta
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+
+from auth_app import authentication
+from auth_app.authentication import authenticate_token
+from auth_app.backends import get_user_by_email
+
+PASSWORD = 'correct horse battery staple'
+
+
+def reset_token_state():
+    """Forget the process-wide token cache and denylist, as a new worker would"""
+    authentication._token_cache = None
+    authentication._denylist = None
+
+
+class JWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('jwt-user', 'jwt-user@example.com', PASSWORD)
+
+    def setUp(self):
+        reset_token_state()
+        self.addCleanup(reset_token_state)
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'email': self.user.email, 'password': PASSWORD},
+                                    content_type='application/json')
+        return response.json()['token']
+
+    def logout(self, token):
+        return self.client.post('/api/auth/logout/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_verified_token_is_served_from_the_cache(self):
+        token = self.login()
+        with self.assertNumQueries(2):  # Denylist load and the user
+            first, claims = authenticate_token(token)
+        with self.assertNumQueries(0):
+            second, _ = authenticate_token(token)
+        self.assertEqual((first.pk, claims['user_id']), (self.user.pk, self.user.pk))
+        self.assertIsNot(first, second)  # Each request gets its own User
+
+    def test_logout_revokes_the_token(self):
+        token = self.login()
+        self.assertEqual(self.logout(token).status_code, 200)
+        self.assertEqual(self.logout(token).status_code, 401)
+        with self.assertRaisesMessage(AuthenticationFailed, 'Token has been revoked'):
+            authenticate_token(token)
+
+        # Other worker processes load the revocation from the denylist table
+        reset_token_state()
+        with self.assertRaisesMessage(AuthenticationFailed, 'Token has been revoked'):
+            authenticate_token(token)
+
+        # Login is not blocked by the revoked Bearer header
+        response = self.client.post('/api/auth/login/', {'email': self.user.email, 'password': PASSWORD},
+                                    content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_expired_and_forged_tokens_are_rejected(self):
+        expired = jwt.encode({'user_id': self.user.pk, 'exp': datetime.utcnow() - timedelta(seconds=1)},
+                             settings.SECRET_KEY, algorithm='HS256')
+        forged = jwt.encode({'user_id': self.user.pk, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                            'forged-key-that-is-not-the-secret-key', algorithm='HS256')
+        with self.assertRaisesMessage(AuthenticationFailed, 'Token has expired'):
+            authenticate_token(expired)
+        with self.assertRaisesMessage(AuthenticationFailed, 'Invalid token'):
+            authenticate_token(forged)
+
+
+class EmailLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('mail-user', 'mail-user@example.com', PASSWORD)
+
+    def register(self, email, username):
+        return self.client.post('/api/auth/register/', {'email': email, 'username': username, 'password': PASSWORD},
+                                content_type='application/json')
+
+    def test_email_backend_ignores_case_and_whitespace(self):
+        with self.assertNumQueries(1):
+            user = authenticate(None, email=' Mail-User@Example.COM ', password=PASSWORD)
+        self.assertEqual(user, self.user)
+        self.assertIsNone(authenticate(None, email='mail-user@example.com', password='wrong'))
+        self.assertIsNone(authenticate(None, email='nobody@example.com', password=PASSWORD))
+
+    def test_inactive_users_cannot_log_in(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(authenticate(None, email='mail-user@example.com', password=PASSWORD))
+
+    def test_login_tells_unknown_email_from_wrong_password(self):
+        login = lambda email, password: self.client.post(
+            '/api/auth/login/', {'email': email, 'password': password}, content_type='application/json')
+        self.assertEqual(login('MAIL-USER@example.com', PASSWORD).status_code, 200)
+        self.assertEqual(login('mail-user@example.com', 'wrong').status_code, 401)
+        self.assertEqual(login('nobody@example.com', PASSWORD).status_code, 404)
+
+    def test_emails_are_unique_regardless_of_case(self):
+        response = self.register(' New.User@Example.com', 'new-user')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'new.user@example.com')
+
+        response = self.register('NEW.USER@example.com', 'someone-else')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'User with this email already exists')
+        self.assertEqual(self.register('other@example.com', 'new-user').json()['message'],
+                         'User with this username already exists')
+
+        # The unique lower(email) index, not just the view, rejects the duplicate
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('direct', 'Mail-User@EXAMPLE.com', PASSWORD)
+        self.assertEqual(get_user_by_email('MAIL-USER@example.com'), self.user)
 
-# Create your tests here.
+    def test_users_without_email_do_not_collide(self):
+        User.objects.create_user('no-mail-1', '', PASSWORD)
+        User.objects.create_user('no-mail-2', '', PASSWORD)
+        self.assertIsNone(get_user_by_email(''))
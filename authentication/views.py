@@ -1,24 +1,28 @@
-from rest_framework.decorators import api_view
+from rest_framework.authentication import get_authorization_header
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from auth_app.authentication import JWTAuthentication, revoke_token
+from auth_app.backends import get_user_by_email, normalize_email
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
 
 @api_view(['POST'])
+@authentication_classes([])  # A stale or revoked Bearer header must not block this
 def login(request):
     email = request.data.get('email')
     password = request.data.get('password')
     
     try:
-        # Find user by email
-        user = User.objects.get(email=email)
-        # Authenticate with username and password
-        auth_user = authenticate(username=user.username, password=password)
+        # EmailBackend loads the user and checks the password in one query
+        user = authenticate(request, email=email, password=password)
         
-        if auth_user is not None:
+        if user is not None:
             # Create JWT token
             token = jwt.encode({
                 'user_id': user.id,
@@ -37,17 +41,18 @@ def login(request):
                     'name': f"{user.first_name} {user.last_name}".strip() or user.username
                 }
             })
+        elif get_user_by_email(email) is None:
+            # Failed logins only: tell an unknown email from a wrong password
+            return Response({
+                'success': False,
+                'message': 'User with this email does not exist'
+            }, status=status.HTTP_404_NOT_FOUND)
         else:
             return Response({
                 'success': False,
                 'message': 'Invalid password'
             }, status=status.HTTP_401_UNAUTHORIZED)
             
-    except User.DoesNotExist:
-        return Response({
-            'success': False,
-            'message': 'User with this email does not exist'
-        }, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         return Response({
             'success': False,
@@ -56,25 +61,31 @@ def login(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
+@authentication_classes([])  # A stale or revoked Bearer header must not block this
 def register(request):
     try:
-        email = request.data.get('email')
+        email = normalize_email(request.data.get('email'))
         password = request.data.get('password')
         username = request.data.get('username', email.split('@')[0])
         
-        # Check if user already exists
-        if User.objects.filter(email=email).exists():
+        # Create new user - the unique lower(email) index rejects duplicates,
+        # so there is no separate existence check
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=username,
+                    email=email,
+                    password=password
+                )
+        except IntegrityError as e:
+            if 'auth_user_email_lower_uniq' in str(e):
+                message = 'User with this email already exists'
+            else:
+                message = 'User with this username already exists'
             return Response({
                 'success': False,
-                'message': 'User with this email already exists'
+                'message': message
             }, status=status.HTTP_400_BAD_REQUEST)
-            
-        # Create new user
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password
-        )
         
         return Response({
             'success': True,
@@ -91,4 +102,16 @@ def register(request):
             'success': False,
             'message': 'Registration failed',
             'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    # Revoke the token this request was authenticated with
+    token = get_authorization_header(request).split()[1].decode()
+    revoke_token(token)
+    return Response({
+        'success': True,
+        'message': 'Logged out'
+    })
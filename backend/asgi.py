@@ -1,3 +1,5 @@
+# Serve with an ASGI worker so async views (e.g. /api/scan/async/) share one event loop:
+#   gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker
 import os 
 from django.core.asgi import get_asgi_application 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings') 
@@ -0,0 +1,129 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """execute_wrapper that counts queries and DB time, keeping slow statements"""
+
+    def __init__(self, slow_ms=0):
+        self.slow_ms = slow_ms
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []  # (sql, ms) of every query
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.seconds += elapsed_ms / 1000
+            self.statements.append((sql, elapsed_ms))
+            if self.slow_ms and elapsed_ms >= self.slow_ms:
+                self.slow.append((sql, elapsed_ms))
+
+    @property
+    def ms(self):
+        return round(self.seconds * 1000, 2)
+
+
+@contextmanager
+def count_queries(slow_ms=0):
+    """Count the queries this thread runs on every configured database"""
+    stats = QueryStats(slow_ms)
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+        yield stats
+
+
+@contextmanager
+def assert_query_budget(max_queries, label='block'):
+    """
+    Fail with the executed SQL when the block runs more than max_queries
+    queries. For tests and the check_query_budgets command:
+
+        with assert_query_budget(3, 'story feed'):
+            client.get('/api/scan/stories/')
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        statements = '\n'.join(f'  {ms:.1f} ms  {sql}' for sql, ms in stats.statements)
+        raise AssertionError(f'{label} ran {stats.count} queries, budget is {max_queries}:\n{statements}')
+
+
+def get_budget(path):
+    """(max queries, max DB ms) for a path - the longest QUERY_BUDGET_PATHS prefix wins"""
+    budget = (settings.QUERY_BUDGET_MAX_QUERIES, settings.QUERY_BUDGET_MAX_DB_MS)
+    matches = [prefix for prefix in settings.QUERY_BUDGET_PATHS if path.startswith(prefix)]
+    if matches:
+        budget = settings.QUERY_BUDGET_PATHS[max(matches, key=len)]
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the SQL queries and DB time of every request. Requests over their
+    budget and single slow statements are logged as warnings; with
+    QUERY_BUDGET_HEADERS the counts are returned in X-DB-Queries /
+    X-DB-Time-Ms and as a 'db' Server-Timing entry.
+
+    Runs natively under both WSGI and ASGI. Only queries of the request
+    (including its sync_to_async calls) are counted, not the probe pool, and
+    a streaming response's queries run after the count is taken.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI async views stay async instead of being adapted to sync
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with count_queries(settings.QUERY_SLOW_MS) as stats:
+            response = self.get_response(request)
+        return self.process_stats(request, response, stats)
+
+    async def __acall__(self, request):
+        # Connections are per thread - count in the thread sync_to_async (and
+        # with it the async ORM) runs this request's queries in
+        counter = count_queries(settings.QUERY_SLOW_MS)
+        stats = await sync_to_async(counter.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(counter.__exit__)(None, None, None)
+        return self.process_stats(request, response, stats)
+
+    def process_stats(self, request, response, stats):
+        max_queries, max_ms = get_budget(request.path)
+        over = (max_queries and stats.count > max_queries) or (max_ms and stats.seconds * 1000 > max_ms)
+        if over:
+            logger.warning('Query budget exceeded: %s %s ran %d queries in %.1f ms (budget %s queries, %s ms)',
+                           request.method, request.path, stats.count, stats.ms, max_queries, max_ms)
+        for sql, ms in stats.slow:
+            logger.warning('Slow query (%.1f ms) in %s %s: %s', ms, request.method, request.path, sql)
+
+        if settings.QUERY_BUDGET_HEADERS:
+            response['X-DB-Queries'] = str(stats.count)
+            response['X-DB-Time-Ms'] = str(stats.ms)
+            if over:
+                response['X-DB-Budget-Exceeded'] = '1'
+            timing = f'db;dur={stats.ms}'
+            response['Server-Timing'] = f"{response['Server-Timing']}, {timing}" if response.has_header('Server-Timing') else timing
+        return response
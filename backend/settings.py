@@ -31,6 +31,7 @@ DATABASES = {
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # ADD THIS LINE AT THE TOP
     'django.middleware.security.SecurityMiddleware',
+    'backend.query_budget.QueryBudgetMiddleware',  # Counts session/auth queries too
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -91,9 +92,195 @@ CSRF_TRUSTED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Email login (one query via the unique lower(email) index), username login for the admin
+AUTHENTICATION_BACKENDS = [
+    'auth_app.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Password hashing cost - PBKDF2 iterations per login (0 = Django's default).
+# Hashes are upgraded/downgraded to the configured cost on the next login.
+# Measure with: python benchmarks/bench_password_hashing.py
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', '0'))
+PASSWORD_HASHERS = [
+    'auth_app.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # REST framework settings
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'auth_app.authentication.JWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ]
 }
+
+# Scan pipeline - SSL and WHOIS probes run in parallel under one deadline
+SCAN_DEADLINE_SECONDS = float(os.environ.get('SCAN_DEADLINE_SECONDS', '8'))
+SCAN_PROBE_WORKERS = int(os.environ.get('SCAN_PROBE_WORKERS', '16'))
+
+# Batch scans - each unique domain is probed once, SCAN_BATCH_CONCURRENCY at a time
+SCAN_BATCH_MAX_URLS = int(os.environ.get('SCAN_BATCH_MAX_URLS', '500'))
+SCAN_BATCH_CONCURRENCY = int(os.environ.get('SCAN_BATCH_CONCURRENCY', '20'))
+
+# Probe result cache keyed by domain - 'memory' for an in-process LRU,
+# or the alias of a Django cache from CACHES to share it between workers
+SCAN_CACHE_BACKEND = os.environ.get('SCAN_CACHE_BACKEND', 'memory')
+SCAN_CACHE_MAX_ENTRIES = int(os.environ.get('SCAN_CACHE_MAX_ENTRIES', '10000'))
+SCAN_CACHE_TTLS = {
+    'ssl': int(os.environ.get('SCAN_CACHE_SSL_TTL', str(15 * 60))),  # Certificates change, keep briefly
+    'whois': int(os.environ.get('SCAN_CACHE_WHOIS_TTL', str(3 * 24 * 3600))),  # Creation dates barely change
+    'error': int(os.environ.get('SCAN_CACHE_ERROR_TTL', '60')),  # Failed probes are retried soon
+}
+
+# Serve a recent ScanResult of the same domain instead of probing again (0 disables)
+SCAN_FRESHNESS_MINUTES = int(os.environ.get('SCAN_FRESHNESS_MINUTES', '10'))
+
+# Stored WHOIS records are refreshed in the background this many days before expiry
+SCAN_WHOIS_REFRESH_DAYS = int(os.environ.get('SCAN_WHOIS_REFRESH_DAYS', '30'))
+# ...and re-queried at most once per this many hours, even when the lookup fails
+SCAN_WHOIS_REFRESH_INTERVAL_HOURS = int(os.environ.get('SCAN_WHOIS_REFRESH_INTERVAL_HOURS', '24'))
+
+# Background scan jobs (python manage.py run_scan_workers)
+SCAN_JOB_WORKERS = int(os.environ.get('SCAN_JOB_WORKERS', '4'))
+SCAN_JOB_POLL_SECONDS = float(os.environ.get('SCAN_JOB_POLL_SECONDS', '1'))
+SCAN_JOB_STALE_SECONDS = int(os.environ.get('SCAN_JOB_STALE_SECONDS', '300'))  # Requeue jobs of crashed workers
+SCAN_JOB_REQUEUE_SECONDS = int(os.environ.get('SCAN_JOB_REQUEUE_SECONDS', '60'))  # How often workers look for them
+SCAN_JOB_MAX_ATTEMPTS = int(os.environ.get('SCAN_JOB_MAX_ATTEMPTS', '3'))  # Then the job is marked failed
+
+# Coalesce concurrent probes of one domain across worker processes (Postgres
+# session advisory lock) - only used when SCAN_CACHE_BACKEND is a shared cache
+SCAN_SINGLE_FLIGHT_DB_LOCK = os.environ.get('SCAN_SINGLE_FLIGHT_DB_LOCK', 'True') == 'True'
+
+# TLS probe engine - connect and handshake have separate timeouts, DNS answers are cached
+SCAN_TLS_CONNECT_TIMEOUT = float(os.environ.get('SCAN_TLS_CONNECT_TIMEOUT', '3'))
+SCAN_TLS_HANDSHAKE_TIMEOUT = float(os.environ.get('SCAN_TLS_HANDSHAKE_TIMEOUT', '5'))
+SCAN_DNS_TTL = int(os.environ.get('SCAN_DNS_TTL', '300'))
+# Extra trusted CA file
+SCAN_TLS_CA_FILE = os.environ.get('SCAN_TLS_CA_FILE') or None
+# 'host:port' to send every TLS probe / WHOIS query to instead of <domain>:443 /
+# the registry's server. Only benchmarks/settings.py sets these, for its stub servers.
+SCAN_TLS_CONNECT_TO = None
+SCAN_WHOIS_SERVER = None
+
+# Overrides for scanner.utils.risk_engine.WEIGHTS, e.g. {'grade_default': 40}.
+# After changing weights run `python manage.py rescore_scans` to update history.
+SCAN_RISK_WEIGHTS = {}
+
+# Lexical analyzer data: a public_suffix_list.dat copy (built-in common suffixes
+# otherwise) and an extra keyword file, one keyword per line
+SCAN_PUBLIC_SUFFIX_FILE = os.environ.get('SCAN_PUBLIC_SUFFIX_FILE') or None
+SCAN_KEYWORDS_FILE = os.environ.get('SCAN_KEYWORDS_FILE') or None
+
+# Local domain reputation feeds (comma-separated paths, one domain or hosts-file
+# line per entry). Listed domains - and their subdomains - skip the network probes.
+SCAN_BLOCKLIST_FILES = [path for path in os.environ.get('SCAN_BLOCKLIST_FILES', '').split(',') if path]
+SCAN_ALLOWLIST_FILES = [path for path in os.environ.get('SCAN_ALLOWLIST_FILES', '').split(',') if path]
+SCAN_REPUTATION_CHECK_SECONDS = int(os.environ.get('SCAN_REPUTATION_CHECK_SECONDS', '30'))  # Feed change polling
+
+# Rows fetched per round trip by the streaming export (server-side cursor on PostgreSQL)
+SCAN_EXPORT_CHUNK_SIZE = int(os.environ.get('SCAN_EXPORT_CHUNK_SIZE', '2000'))
+
+# Keep the daily risk rollups current on every saved scan. When disabled, run
+# `python manage.py rebuild_rollups --days 2` periodically instead.
+SCAN_ROLLUPS_ON_SAVE = os.environ.get('SCAN_ROLLUPS_ON_SAVE', 'True') == 'True'
+
+# Community stories feed - the default-size first page of each scam type is cached
+# in STORY_FEED_CACHE, shared by all workers so moderation shows up everywhere
+STORY_FEED_PAGE_SIZE = int(os.environ.get('STORY_FEED_PAGE_SIZE', '20'))
+STORY_FEED_CACHE_SECONDS = int(os.environ.get('STORY_FEED_CACHE_SECONDS', '300'))
+STORY_FEED_CACHE = os.environ.get('STORY_FEED_CACHE', 'shared')
+
+# JWT verification - decoded claims and the User are cached per token; revoked
+# tokens are reloaded from the denylist table every JWT_DENYLIST_REFRESH_SECONDS
+JWT_CACHE_TTL_SECONDS = int(os.environ.get('JWT_CACHE_TTL_SECONDS', '60'))
+JWT_CACHE_MAX_ENTRIES = int(os.environ.get('JWT_CACHE_MAX_ENTRIES', '10000'))
+JWT_DENYLIST_REFRESH_SECONDS = int(os.environ.get('JWT_DENYLIST_REFRESH_SECONDS', '30'))
+
+# Caches - 'default' is local to each process; 'shared' holds state every worker
+# and probe process must see (rate-limit buckets, WHOIS budgets, the story
+# feed's first pages). Set
+# SHARED_CACHE_URL to redis://host:6379/0, memcached://host:11211 or 'db'
+# (DatabaseCache - run `python manage.py createcachetable`). Left empty it is
+# local memory: each worker then keeps its own limits and feed pages, which
+# backend.shared_cache logs a warning about when SHARED_CACHE_WARN (default:
+# DEBUG off - read here, since the test runner turns DEBUG off later) and
+# refuses when SHARED_CACHE_REQUIRED.
+SHARED_CACHE_URL = os.environ.get('SHARED_CACHE_URL', '')
+SHARED_CACHE_WARN = os.environ.get('SHARED_CACHE_WARN', str(not DEBUG)) == 'True'
+SHARED_CACHE_REQUIRED = os.environ.get('SHARED_CACHE_REQUIRED', 'False') == 'True'
+if SHARED_CACHE_URL.startswith(('redis://', 'rediss://')):
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': SHARED_CACHE_URL}
+elif SHARED_CACHE_URL.startswith('memcached://'):
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+                    'LOCATION': SHARED_CACHE_URL[len('memcached://'):]}
+elif SHARED_CACHE_URL == 'db':
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'shared_cache'}
+else:
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'}
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': SHARED_CACHE,
+}
+
+# Rate limits for requests that probe the network - token buckets of
+# (tokens per minute, burst) per client IP and per signed-in user, 0 disables.
+# Buckets live in this (shared) Django cache.
+SCAN_RATE_LIMIT_CACHE = os.environ.get('SCAN_RATE_LIMIT_CACHE', 'shared')
+SCAN_RATE_LIMITS = {
+    'ip': (int(os.environ.get('SCAN_RATE_LIMIT_IP_PER_MINUTE', '30')), int(os.environ.get('SCAN_RATE_LIMIT_IP_BURST', '10'))),
+    'user': (int(os.environ.get('SCAN_RATE_LIMIT_USER_PER_MINUTE', '60')), int(os.environ.get('SCAN_RATE_LIMIT_USER_BURST', '20'))),
+}
+# Batch scans have their own buckets, charged one token per domain they probe.
+# A batch may not probe more domains than the burst, so keep it at SCAN_BATCH_MAX_URLS.
+SCAN_BATCH_RATE_LIMITS = {
+    'ip': (int(os.environ.get('SCAN_BATCH_RATE_LIMIT_IP_PER_MINUTE', '100')),
+           int(os.environ.get('SCAN_BATCH_RATE_LIMIT_IP_BURST', str(SCAN_BATCH_MAX_URLS)))),
+    'user': (int(os.environ.get('SCAN_BATCH_RATE_LIMIT_USER_PER_MINUTE', '200')),
+             int(os.environ.get('SCAN_BATCH_RATE_LIMIT_USER_BURST', str(SCAN_BATCH_MAX_URLS)))),
+}
+# Client IP from the first X-Forwarded-For entry (only behind a trusted proxy)
+SCAN_RATE_LIMIT_TRUST_FORWARDED = os.environ.get('SCAN_RATE_LIMIT_TRUST_FORWARDED', 'False') == 'True'
+# Global budget of live WHOIS queries per registry (TLD): (queries per second, burst).
+# Over budget the WHOIS probe returns unknown and the scan is saved as partial.
+SCAN_WHOIS_RATE = (float(os.environ.get('SCAN_WHOIS_PER_SECOND', '1')), int(os.environ.get('SCAN_WHOIS_BURST', '3')))
+
+# Per-request SQL budget (backend.query_budget.QueryBudgetMiddleware) - requests
+# over it are logged as warnings, 0 disables a limit. QUERY_BUDGET_PATHS overrides
+# it per path prefix as (max queries, max DB ms). Statements slower than
+# QUERY_SLOW_MS are logged with their SQL. `python manage.py check_query_budgets`
+# asserts the budgets of the scan, auth and admin list views.
+QUERY_BUDGET_MAX_QUERIES = int(os.environ.get('QUERY_BUDGET_MAX_QUERIES', '20'))
+QUERY_BUDGET_MAX_DB_MS = float(os.environ.get('QUERY_BUDGET_MAX_DB_MS', '500'))
+QUERY_BUDGET_PATHS = {
+    '/admin/': (40, 1000),
+}
+QUERY_SLOW_MS = float(os.environ.get('QUERY_SLOW_MS', '200'))
+# X-DB-Queries / X-DB-Time-Ms response headers
+QUERY_BUDGET_HEADERS = os.environ.get('QUERY_BUDGET_HEADERS', str(DEBUG)) == 'True'
+
+# Admin changelists of large tables show the planner's row estimate (PostgreSQL)
+# instead of COUNT(*) once a result has more rows than this
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+
+# Scan history retention (python manage.py prune_scans): days a ScanResult stays
+# in the hot table per risk category, 0 keeps it forever. The newest scan of each
+# domain and scans with community reports are never pruned. Pruned rows are moved
+# to ScanResultArchive (without report_card) unless SCAN_RETENTION_ARCHIVE is
+# False - rebuild_rollups reads the archive, so without it the rollups of pruned
+# days can no longer be rebuilt.
+SCAN_RETENTION_DAYS = {
+    'low': int(os.environ.get('SCAN_RETENTION_LOW_DAYS', '30')),
+    'medium': int(os.environ.get('SCAN_RETENTION_MEDIUM_DAYS', '90')),
+    'high': int(os.environ.get('SCAN_RETENTION_HIGH_DAYS', '180')),
+    'critical': int(os.environ.get('SCAN_RETENTION_CRITICAL_DAYS', '365')),
+}
+SCAN_RETENTION_ARCHIVE = os.environ.get('SCAN_RETENTION_ARCHIVE', 'True') == 'True'
+SCAN_RETENTION_BATCH_SIZE = int(os.environ.get('SCAN_RETENTION_BATCH_SIZE', '1000'))
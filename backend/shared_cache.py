@@ -0,0 +1,60 @@
+import logging
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+# Backends whose entries only the current process can see
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+logger = logging.getLogger(__name__)
+
+# Settings naming a cache alias that every worker process must share
+SHARED_CACHE_SETTINGS = ('SCAN_RATE_LIMIT_CACHE', 'STORY_FEED_CACHE')
+
+
+def is_local(alias):
+    return settings.CACHES[alias]['BACKEND'] in LOCAL_BACKENDS
+
+
+# Aliases already warned about, so the log gets one line per process
+_warned = set()
+
+
+def shared_cache(alias):
+    """
+    The Django cache `alias`, for state all workers must agree on. A
+    per-process backend is refused when SHARED_CACHE_REQUIRED is set, and
+    otherwise used with a warning when SHARED_CACHE_WARN is.
+    """
+    if is_local(alias):
+        if settings.SHARED_CACHE_REQUIRED:
+            raise ImproperlyConfigured(
+                f"Cache '{alias}' is local to each process - set SHARED_CACHE_URL to Redis, Memcached or 'db'"
+            )
+        if settings.SHARED_CACHE_WARN and alias not in _warned:
+            _warned.add(alias)
+            logger.warning("Cache '%s' is local to each process, so workers do not share its state", alias)
+    return caches[alias]
+
+
+def check_shared_caches(app_configs=None, **kwargs):
+    """System check: the same rule as shared_cache, reported by manage.py check/migrate"""
+    if settings.SHARED_CACHE_REQUIRED:
+        level, error_id = checks.Error, 'backend.E001'
+    elif settings.SHARED_CACHE_WARN:
+        level, error_id = checks.Warning, 'backend.W001'
+    else:
+        return []
+    return [
+        level(
+            f"{name} = '{getattr(settings, name)}' is a per-process cache",
+            hint="Set SHARED_CACHE_URL to redis://..., memcached://... or 'db'.",
+            id=error_id,
+        )
+        for name in SHARED_CACHE_SETTINGS
+        if is_local(getattr(settings, name))
+    ]
@@ -0,0 +1,85 @@
+"""
+Requests per second through a DRF view authenticated by JWTAuthentication,
+with the decoded-token cache enabled and disabled.
+
+Usage: python benchmarks/bench_jwt_auth.py [--requests 5000]
+Uses an in-memory SQLite database, so no project database is needed.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+settings.configure(
+    SECRET_KEY='bench-secret-key-of-at-least-32-bytes',
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'rest_framework', 'auth_app'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    USE_TZ=True,
+    JWT_CACHE_TTL_SECONDS=60,
+    JWT_CACHE_MAX_ENTRIES=10000,
+    JWT_DENYLIST_REFRESH_SECONDS=30,
+)
+django.setup()
+
+import jwt
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from auth_app.authentication import JWTAuthentication
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def whoami(request):
+    return Response({'user': request.user.username})
+
+
+def measure(name, request_factory, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = whoami(request_factory())
+        assert response.status_code == 200, response.data
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10}{count / elapsed:>12.0f}{elapsed / count * 1e6:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+    # Same claims as authentication.views.login
+    token = jwt.encode({
+        'user_id': user.id,
+        'email': user.email,
+        'exp': datetime.utcnow() + timedelta(hours=24),
+    }, settings.SECRET_KEY, algorithm='HS256')
+
+    factory = APIRequestFactory()
+    make_request = lambda: factory.get('/whoami/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    make_request_no_auth = lambda: factory.get('/whoami/')  # Baseline cost of DRF itself
+
+    print(f"{'path':<10}{'req/s':>12}{'us/req':>12}")
+    settings.JWT_CACHE_TTL_SECONDS = 0  # Entries expire immediately: decode + User query every time
+    measure('uncached', make_request, args.requests)
+    settings.JWT_CACHE_TTL_SECONDS = 60
+    measure('cached', make_request, args.requests)
+
+    whoami.cls.permission_classes = []
+    measure('no auth', make_request_no_auth, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Cost of one password check (the CPU-bound part of every login) for several
+PBKDF2 iteration counts, as ms per check and logins per second per core.
+
+Usage: python benchmarks/bench_password_hashing.py [--iterations 100000 600000 1000000] [--checks 20]
+Pick PASSWORD_HASH_ITERATIONS from the result: the highest count whose
+logins/s per core times the server's cores still covers peak login traffic.
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+settings.configure(
+    SECRET_KEY='bench-secret-key-of-at-least-32-bytes',
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth'],
+    PASSWORD_HASHERS=['auth_app.hashers.ConfigurablePBKDF2PasswordHasher'],
+    PASSWORD_HASH_ITERATIONS=0,
+)
+django.setup()
+
+from django.contrib.auth.hashers import check_password, make_password
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, nargs='+', default=[100000, 300000, 600000, 1000000])
+    parser.add_argument('--checks', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'iterations':>12}{'ms/check':>12}{'logins/s/core':>16}")
+    for iterations in args.iterations:
+        settings.PASSWORD_HASH_ITERATIONS = iterations
+        encoded = make_password('bench-password')
+        start = time.perf_counter()
+        for _ in range(args.checks):
+            assert check_password('bench-password', encoded)
+        elapsed = (time.perf_counter() - start) / args.checks
+        print(f"{iterations:>12}{elapsed * 1000:>12.1f}{1 / elapsed:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Load test of the scan and auth API against local stub TLS and WHOIS servers.
+
+Serves the project's WSGI app on 127.0.0.1 with Django's threaded server,
+points the scan pipeline at the stubs (SCAN_TLS_CONNECT_TO and SCAN_WHOIS_SERVER,
+read only by benchmarks/settings.py, and SCAN_TLS_CA_FILE) and sends real HTTP
+requests from --concurrency clients.
+Reports throughput, p50/p95/p99 latency and DB queries per request for each
+scenario and writes everything to a JSON file:
+
+    scan_cold  POST /api/scan/?fresh=1, a new domain each time (TLS + WHOIS + insert)
+    scan_warm  POST /api/scan/ for recently scanned domains (served from the database)
+    login      POST /api/auth/login/ (dominated by PASSWORD_HASH_ITERATIONS)
+    register   POST /api/auth/register/, a new user each time
+
+Usage: python benchmarks/bench_scan_api.py [--concurrency 16] [--requests 300]
+           [--tls-latency 0.02] [--tls-failure-rate 0.05]
+           [--whois-latency 0.1] [--whois-failure-rate 0.05]
+           [--output bench-results.json] [--compare previous.json]
+Runs offline: a temporary SQLite database is used unless --database-url is given.
+Rate limits are disabled for the run.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.tls_server import LocalTLSServer
+from benchmarks.whois_server import LocalWhoisServer
+
+# Scanned domains are <name>.bench.test; bench.test is declared a public
+# suffix so each one is its own registrable domain (and WHOIS lookup)
+BENCH_SUFFIX = 'bench.test'
+SCENARIOS = ('scan_cold', 'scan_warm', 'login', 'register')
+WARM_DOMAINS = 20
+PASSWORD = 'bench-password-123'
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryCounter:
+    """Counts the queries of every database connection, whichever thread opened it"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def configure_django(args, tls, whois_server, workdir):
+    """Point the project settings at the stubs before Django is set up"""
+    suffix_file = os.path.join(workdir, 'suffixes.dat')
+    from scanner.utils.lexical import DEFAULT_SUFFIX_RULES
+    with open(suffix_file, 'w') as f:
+        f.write('\n'.join(DEFAULT_SUFFIX_RULES + [BENCH_SUFFIX]) + '\n')
+
+    os.environ.update({
+        'DJANGO_SETTINGS_MODULE': 'benchmarks.settings',
+        'DATABASE_URL': args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}",
+        'DEBUG': 'False',
+        'SHARED_CACHE_URL': 'db',  # Shared rate-limit and WHOIS buckets, as in production
+        'SCAN_TLS_CONNECT_TO': f'127.0.0.1:{tls.port}',
+        'SCAN_TLS_CA_FILE': tls.cert,
+        'SCAN_WHOIS_SERVER': f'127.0.0.1:{whois_server.port}',
+        'SCAN_PUBLIC_SUFFIX_FILE': suffix_file,
+        'SCAN_RATE_LIMIT_IP_PER_MINUTE': '0',
+        'SCAN_RATE_LIMIT_USER_PER_MINUTE': '0',
+        'SCAN_WHOIS_PER_SECOND': '0',
+        'SCAN_DEADLINE_SECONDS': str(args.deadline),
+    })
+    if args.hash_iterations is not None:
+        os.environ['PASSWORD_HASH_ITERATIONS'] = str(args.hash_iterations)
+
+    import django
+    from django.conf import settings
+    if settings.DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        # Concurrent writers wait for the lock instead of failing at once
+        settings.DATABASES['default'].setdefault('OPTIONS', {}).update({
+            'timeout': 30, 'init_command': 'PRAGMA journal_mode=WAL;',
+        })
+    django.setup()
+
+
+def start_app():
+    """Serve the WSGI app on a free port from a background thread"""
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=True)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def post(port, path, body, timeout):
+    """One request on a fresh connection - returns (status, seconds)"""
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('POST', path, json.dumps(body), {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except OSError:
+        status = 0  # Connection error or client timeout
+    finally:
+        conn.close()
+    return status, time.perf_counter() - start
+
+
+def scenario_requests(name, count, run_id):
+    """(path, body) of each request of a scenario"""
+    if name == 'scan_cold':
+        return [('/api/scan/?fresh=1', {'url': f'https://c{run_id}-{i}.{BENCH_SUFFIX}/'}) for i in range(count)]
+    if name == 'scan_warm':
+        return [('/api/scan/', {'url': f'https://w{run_id}-{i % WARM_DOMAINS}.{BENCH_SUFFIX}/'}) for i in range(count)]
+    if name == 'login':
+        return [('/api/auth/login/', {'email': f'bench-{run_id}@{BENCH_SUFFIX}', 'password': PASSWORD})] * count
+    return [('/api/auth/register/', {
+        'email': f'r{run_id}-{i}@{BENCH_SUFFIX}', 'username': f'r{run_id}-{i}', 'password': PASSWORD,
+    }) for i in range(count)]
+
+
+def prepare(name, port, run_id, timeout):
+    """Unmeasured setup: the login user and the recent scans scan_warm reuses"""
+    if name == 'login':
+        from django.contrib.auth.models import User
+        User.objects.create_user(f'bench-{run_id}', f'bench-{run_id}@{BENCH_SUFFIX}', PASSWORD)
+    elif name == 'scan_warm':
+        for i in range(WARM_DOMAINS):
+            post(port, '/api/scan/?fresh=1', {'url': f'https://w{run_id}-{i}.{BENCH_SUFFIX}/'}, timeout)
+
+
+def run_scenario(name, port, args, run_id, counter):
+    prepare(name, port, run_id, args.timeout)
+    requests = scenario_requests(name, args.requests, run_id)
+    queries_before = counter.count
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda request: post(port, *request, args.timeout), requests))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds for _, seconds in results]
+    statuses = Counter(status for status, _ in results)
+    return {
+        'requests': len(results),
+        'concurrency': args.concurrency,
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(results) / elapsed, 1),
+        'errors': sum(count for status, count in statuses.items() if not 200 <= status < 300),
+        'statusCodes': {str(status): count for status, count in sorted(statuses.items())},
+        'latencyMs': {
+            'p50': round(percentile(latencies, 50) * 1000, 1),
+            'p95': round(percentile(latencies, 95) * 1000, 1),
+            'p99': round(percentile(latencies, 99) * 1000, 1),
+            'mean': round(statistics.mean(latencies) * 1000, 1),
+            'max': round(max(latencies) * 1000, 1),
+        },
+        # All threads, including the probe pool's WHOIS store queries
+        'queriesPerRequest': round((counter.count - queries_before) / len(results), 2),
+    }
+
+
+def print_results(results, previous=None):
+    print(f"{'scenario':<11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}")
+    for name, result in results['scenarios'].items():
+        latency = result['latencyMs']
+        line = (f"{name:<11}{result['throughput']:>9.1f}{latency['p50']:>9.1f}{latency['p95']:>9.1f}"
+                f"{latency['p99']:>9.1f}{result['queriesPerRequest']:>9.2f}{result['errors']:>8}")
+        before = (previous or {}).get('scenarios', {}).get(name)
+        if before:
+            change = (result['throughput'] / before['throughput'] - 1) * 100
+            line += f"   req/s {change:+.1f}% vs {previous.get('commit') or 'previous'}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=16, help='Clients sending requests in parallel')
+    parser.add_argument('--requests', type=int, default=300, help='Requests per scenario')
+    parser.add_argument('--tls-latency', type=float, default=0.02, help='Seconds before each TLS handshake')
+    parser.add_argument('--tls-failure-rate', type=float, default=0.05)
+    parser.add_argument('--whois-latency', type=float, default=0.1, help='Seconds before each WHOIS answer')
+    parser.add_argument('--whois-failure-rate', type=float, default=0.05)
+    parser.add_argument('--deadline', type=float, default=8.0, help='SCAN_DEADLINE_SECONDS for the run')
+    parser.add_argument('--hash-iterations', type=int, help='PASSWORD_HASH_ITERATIONS for the run')
+    parser.add_argument('--database-url', help='Benchmark against this database instead of a temporary SQLite file')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Client timeout per request')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench-results.json')
+    parser.add_argument('--compare', help='Earlier --output file to compare throughput with')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-scan-api-')
+    tls = LocalTLSServer(latency=args.tls_latency, failure_rate=args.tls_failure_rate,
+                         hostnames=(f'*.{BENCH_SUFFIX}',), seed=args.seed)
+    whois_server = LocalWhoisServer(latency=args.whois_latency, failure_rate=args.whois_failure_rate,
+                                    seed=args.seed)
+    try:
+        with tls, whois_server:
+            configure_django(args, tls, whois_server, workdir)
+            from django.core.management import call_command
+            from django.db import connection
+            from django.db.backends.signals import connection_created
+
+            call_command('migrate', verbosity=0)
+            call_command('createcachetable', verbosity=0)
+            counter = QueryCounter()
+            connection_created.connect(counter.install)
+            server = start_app()
+            port = server.server_address[1]
+            run_id = int(time.time())  # Fresh domains and users even on a reused --database-url
+
+            results = {
+                'startedAt': datetime.now(timezone.utc).isoformat(),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'config': {key: value for key, value in vars(args).items()
+                           if key not in ('database_url', 'output', 'compare')},
+                'scenarios': {},
+            }
+            for name in args.scenarios:
+                results['scenarios'][name] = run_scenario(name, port, args, run_id, counter)
+            results['stubs'] = {'whoisQueries': whois_server.queries}
+            server.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_results(results, previous)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark TLSProbeEngine against the old per-probe context + create_connection.
+
+Usage: python benchmarks/bench_tls_engine.py [--probes 300] [--latency 0.0]
+Runs against a local TLS server, so no network access is needed.
+"""
+import argparse
+import os
+import resource
+import socket
+import ssl
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.tls_server import LocalTLSServer
+from scanner.utils.tls_engine import TLSProbeEngine
+
+
+def legacy_probe(host, port, cafile):
+    # What check_ssl did before: new context, fresh DNS lookup, one timeout
+    context = ssl.create_default_context()
+    context.load_verify_locations(cafile=cafile)
+    with socket.create_connection((host, port), timeout=10) as sock:
+        with context.wrap_socket(sock, server_hostname=host) as ssock:
+            return ssock.getpeercert(), ssock.version()
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(name, probe, count):
+    latencies = []
+    cpu_start = cpu_seconds()
+    for _ in range(count):
+        start = time.perf_counter()
+        probe()
+        latencies.append(time.perf_counter() - start)
+    cpu = cpu_seconds() - cpu_start
+    latencies.sort()
+    print(f"{name:<10}"
+          f"{statistics.median(latencies) * 1000:>10.2f}"
+          f"{latencies[int(0.99 * (count - 1))] * 1000:>10.2f}"
+          f"{cpu / count * 1000:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--probes', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.0, help='Server-side delay per connection')
+    parser.add_argument('--tls12', action='store_true', help='Cap the server at TLS 1.2')
+    args = parser.parse_args()
+
+    max_version = ssl.TLSVersion.TLSv1_2 if args.tls12 else None
+    with LocalTLSServer(latency=args.latency, max_version=max_version) as server:
+        engine = TLSProbeEngine(context=server.client_context())
+        host, port = 'localhost', server.port
+
+        # Warm up both paths once
+        legacy_probe(host, port, server.cert)
+        engine.handshake(host, port)
+
+        print(f"{'path':<10}{'p50 ms':>10}{'p99 ms':>10}{'cpu ms/op':>12}")
+        measure('legacy', lambda: legacy_probe(host, port, server.cert), args.probes)
+        measure('engine', lambda: engine.handshake(host, port), args.probes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""
+Settings for benchmarks/bench_scan_api.py: the production settings, plus the
+hooks that send every TLS probe and WHOIS query to the local stub servers.
+"""
+import os
+
+from backend.settings import *  # noqa: F401,F403
+
+SCAN_TLS_CONNECT_TO = os.environ.get('SCAN_TLS_CONNECT_TO') or None
+SCAN_WHOIS_SERVER = os.environ.get('SCAN_WHOIS_SERVER') or None
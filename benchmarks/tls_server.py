@@ -0,0 +1,101 @@
+"""
+Local TLS server fixture for offline benchmarks.
+
+Generates a throwaway self-signed certificate (for localhost by default) with
+the openssl CLI and serves TLS handshakes on 127.0.0.1 from a background thread:
+
+    with LocalTLSServer(latency=0.01) as server:
+        context = server.client_context()   # trusts the throwaway cert
+        ... connect to ('localhost', server.port) ...
+
+failure_rate drops that share of connections before the handshake.
+"""
+import os
+import random
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def make_self_signed_cert(directory, days=90, hostnames=('localhost',)):
+    """Write cert.pem/key.pem for hostnames (wildcards allowed) into directory and return their paths"""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    names = ','.join(f'DNS:{hostname}' for hostname in hostnames)
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+        '-keyout', key, '-out', cert, '-days', str(days),
+        '-subj', f'/CN={hostnames[0]}/O=Viligante Test CA',
+        '-addext', f'subjectAltName={names},IP:127.0.0.1',
+    ], check=True, capture_output=True)
+    return cert, key
+
+
+class LocalTLSServer:
+    """Threaded TLS server that completes handshakes, optionally after a delay"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, cert_days=90, max_version=None,
+                 hostnames=('localhost',), failure_rate=0.0, seed=None):
+        self.host = host
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._tmpdir = tempfile.mkdtemp(prefix='tls-fixture-')
+        self.cert, self.key = make_self_signed_cert(self._tmpdir, cert_days, hostnames)
+
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(self.cert, self.key)
+        if max_version is not None:
+            self.context.maximum_version = max_version
+
+        self._sock = socket.create_server((host, port), backlog=512)
+        self.port = self._sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def client_context(self):
+        """Default client SSLContext that also trusts this server's certificate"""
+        context = ssl.create_default_context()
+        context.load_verify_locations(cafile=self.cert)
+        return context
+
+    def _serve(self):
+        self._sock.settimeout(0.2)
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        if self._random.random() < self.failure_rate:
+            conn.close()  # Simulated broken host: the client's handshake fails
+            return
+        try:
+            if self.latency:
+                time.sleep(self.latency)  # Simulated network/server delay
+            with self.context.wrap_socket(conn, server_side=True) as tls:
+                tls.settimeout(1)
+                try:
+                    tls.recv(1)  # Wait for the client to close
+                except (OSError, ssl.SSLError):
+                    pass
+        except (OSError, ssl.SSLError):
+            conn.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sock.close()
+        self._thread.join()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
@@ -0,0 +1,81 @@
+"""
+Local WHOIS server fixture for offline benchmarks.
+
+Answers RFC 3912 queries (one domain per connection) on 127.0.0.1 from a
+background thread with a registry-style record, optionally after a delay:
+
+    with LocalWhoisServer(latency=0.05, failure_rate=0.1) as server:
+        ... settings.SCAN_WHOIS_SERVER = f'127.0.0.1:{server.port}' ...
+
+failure_rate closes that share of connections without an answer, like an
+overloaded registry. The creation date is derived from the domain, so a
+domain always gets the same age.
+"""
+import random
+import socket
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+
+RECORD = (
+    'Domain Name: {domain}\r\n'
+    'Registrar: Viligante Bench Registrar\r\n'
+    'Creation Date: {created}T00:00:00Z\r\n'
+    'Registry Expiry Date: {expires}T00:00:00Z\r\n'
+)
+
+
+def whois_record(domain):
+    # Ages spread over 0-20 years so every risk band gets traffic
+    created = date(2025, 1, 1) - timedelta(days=zlib.crc32(domain.encode()) % (20 * 365))
+    expires = created.replace(year=created.year + 30)
+    return RECORD.format(domain=domain.upper(), created=created.isoformat(), expires=expires.isoformat())
+
+
+class LocalWhoisServer:
+    """Threaded WHOIS server with configurable latency and failure rate"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.queries = 0
+        self._random = random.Random(seed)
+        self._sock = socket.create_server((host, port), backlog=512)
+        self.port = self._sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def _serve(self):
+        self._sock.settimeout(0.2)
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                conn.settimeout(5)
+                query = conn.makefile('rb').readline().decode('idna').strip()
+                self.queries += 1
+                if self.latency:
+                    time.sleep(self.latency)  # Simulated registry delay
+                if self._random.random() < self.failure_rate:
+                    return  # Closed without an answer
+                conn.sendall(whois_record(query).encode())
+            except (OSError, UnicodeError):
+                pass
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sock.close()
+        self._thread.join()
@@ -1,26 +1,97 @@
 from django.contrib import admin
-from .models import ScanResult, SecurityReport, CommunityReport, CommunityStory
+from .models import SSL_GRADES, ScanResult, ScanResultArchive, SecurityReport, CommunityReport, CommunityStory, WhoisRecord, ScanJob, DailyRiskRollup, DailyDomainRisk
+from .utils.pagination import EstimatedCountPaginator
+from .utils.search import filter_scans
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist for tables with millions of rows: estimated page counts, no
+    second unfiltered COUNT(*), and a date hierarchy built from index probes
+    (see templatetags/scanner_admin.py) instead of SELECT DISTINCT.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/scanner/large_table_change_list.html'
+
+class SSLGradeFilter(admin.SimpleListFilter):
+    """Fixed grade choices - the default filter runs SELECT DISTINCT ssl_grade over the table"""
+    title = 'SSL grade'
+    parameter_name = 'ssl_grade'
+
+    def lookups(self, request, model_admin):
+        return [(grade, grade) for grade in SSL_GRADES]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(ssl_grade=self.value())
+        return queryset
 
 @admin.register(ScanResult)
-class ScanResultAdmin(admin.ModelAdmin):
+class ScanResultAdmin(LargeTableAdmin):
     list_display = ['url', 'domain', 'risk_level', 'risk_category', 'ssl_grade', 'domain_age', 'created_at']
-    list_filter = ['risk_category', 'ssl_grade', 'created_at']
+    list_filter = ['risk_category', SSLGradeFilter, 'created_at']
     search_fields = ['url', 'domain']
+    date_hierarchy = 'created_at'
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
 
+    def get_search_results(self, request, queryset, search_term):
+        # lower(url)/lower(domain) LIKE, which the trigram indexes serve
+        # (the default icontains compiles to UPPER(...) LIKE and scans the table)
+        term = search_term.strip().lower()
+        if not term:
+            return queryset, False
+        return filter_scans(queryset, term), False
+
+@admin.register(ScanResultArchive)
+class ScanResultArchiveAdmin(LargeTableAdmin):
+    list_display = ['url', 'domain', 'risk_level', 'risk_category', 'ssl_grade', 'created_at', 'archived_at']
+    list_filter = ['risk_category', SSLGradeFilter]
+    search_fields = ['=domain']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+
 @admin.register(SecurityReport)
-class SecurityReportAdmin(admin.ModelAdmin):
+class SecurityReportAdmin(LargeTableAdmin):
     list_display = ['scan_result', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['scan_result']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
 
 @admin.register(CommunityReport)
-class CommunityReportAdmin(admin.ModelAdmin):
+class CommunityReportAdmin(LargeTableAdmin):
     list_display = ['scan_result', 'user', 'accurate', 'created_at']
     list_filter = ['accurate', 'created_at']
+    list_select_related = ['scan_result', 'user']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
 
 @admin.register(CommunityStory)
 class CommunityStoryAdmin(admin.ModelAdmin):
     list_display = ['title', 'scam_type', 'status', 'is_public', 'created_at']
     list_filter = ['scam_type', 'status', 'is_public', 'created_at']
-    search_fields = ['title', 'story']
\ No newline at end of file
+    search_fields = ['title', 'story']
+
+@admin.register(WhoisRecord)
+class WhoisRecordAdmin(admin.ModelAdmin):
+    list_display = ['domain', 'created', 'registrar', 'expiration', 'fetched_at']
+    search_fields = ['domain']
+    readonly_fields = ['fetched_at']
+
+@admin.register(ScanJob)
+class ScanJobAdmin(LargeTableAdmin):
+    list_display = ['id', 'url', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+@admin.register(DailyRiskRollup)
+class DailyRiskRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'risk_category', 'ssl_grade', 'count']
+    list_filter = ['risk_category', 'ssl_grade']
+
+@admin.register(DailyDomainRisk)
+class DailyDomainRiskAdmin(LargeTableAdmin):
+    list_display = ['day', 'domain', 'max_risk', 'scans']
+    search_fields = ['domain']
+    date_hierarchy = 'day'
@@ -2,4 +2,10 @@ from django.apps import AppConfig
 
 class ScannerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'scanner'
\ No newline at end of file
+    name = 'scanner'
+
+    def ready(self):
+        from django.core import checks
+        from backend.shared_cache import check_shared_caches
+        from . import signals  # noqa: F401 - registers the rollup, feed and search receivers
+        checks.register(check_shared_caches, checks.Tags.caches)
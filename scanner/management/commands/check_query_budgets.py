@@ -0,0 +1,121 @@
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, transaction
+from django.test import Client
+from django.urls import reverse
+from backend.query_budget import assert_query_budget
+from scanner.models import CommunityReport, CommunityStory, ScanJob, ScanResult, SecurityReport, WhoisRecord
+from scanner.utils.story_feed import invalidate_first_pages
+
+# Rows per model - enough that an N+1 query in a list view blows its budget
+ROWS = 10
+PASSWORD = 'budget-check-password'
+
+# Most queries each view may run against the sample data
+BUDGETS = {
+    'scan (recent verdict)': 1,
+    'scan job status': 1,
+    'story feed': 1,
+    'search': 6,
+    'risk stats': 2,
+    'login': 1,
+    'register': 3,
+    'logout': 4,
+    'admin list': 12,
+}
+
+
+def create_sample_data():
+    user = User.objects.create_user('budget-user', 'budget-user@example.com', PASSWORD)
+    scans = [
+        ScanResult.objects.create(
+            url=f'https://budget-{i}.example.com/login', risk_level=10 * i, ssl_grade='A',
+            domain_age=i, report_card={},
+        )
+        for i in range(ROWS)
+    ]
+    for i, scan in enumerate(scans):
+        SecurityReport.objects.create(scan_result=scan, recommendations='Check the sender')
+        CommunityReport.objects.create(scan_result=scan, user=user, comments='Seen in a phishing mail')
+        ScanJob.objects.create(url=scan.url, domain=scan.domain, status='done', result=scan)
+        WhoisRecord.objects.create(domain=f'budget-{i}.example.com', created='2020-01-01')
+        CommunityStory.objects.create(
+            title=f'Phishing mail {i}', story=f'A phishing mail linked to {scan.url}',
+            scam_type='phishing', status='approved', user=user,
+        )
+    return user, scans
+
+
+class Command(BaseCommand):
+    help = 'Assert the SQL query budget of the scan, auth and admin list views (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-sql', action='store_true', help='Print the SQL of views over budget')
+
+    def handle(self, *args, **options):
+        # Keep one connection for the whole check, as Django's TestCase does
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with transaction.atomic():
+                failures = self.run_checks()
+                transaction.set_rollback(True)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        if failures:
+            if options['verbose_sql']:
+                self.stderr.write('\n\n'.join(failures))
+            raise CommandError(f'{len(failures)} view(s) over their query budget')
+        self.stdout.write(self.style.SUCCESS('All views within their query budget'))
+
+    def run_checks(self):
+        user, scans = create_sample_data()
+        invalidate_first_pages()  # The story feed's first page must come from the database
+        client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+        token = client.post('/api/auth/login/', {'email': user.email, 'password': PASSWORD},
+                            content_type='application/json').json()['token']
+        job_id = ScanJob.objects.values_list('id', flat=True).first()
+        superuser = User.objects.create_superuser('budget-admin', 'budget-admin@example.com', PASSWORD)
+        admin_client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+        admin_client.force_login(superuser)
+
+        checks = [
+            ('scan (recent verdict)', BUDGETS['scan (recent verdict)'],
+             lambda: client.post('/api/scan/', {'url': scans[0].url}, content_type='application/json')),
+            ('scan job status', BUDGETS['scan job status'],
+             lambda: client.get(f'/api/scan/jobs/{job_id}/')),
+            ('story feed', BUDGETS['story feed'], lambda: client.get('/api/scan/stories/')),
+            ('search', BUDGETS['search'], lambda: admin_client.get('/api/scan/search/?q=phishing mail')),  # Staff: stories and scans
+            ('risk stats', BUDGETS['risk stats'], lambda: client.get('/api/scan/stats/')),
+            ('login', BUDGETS['login'], lambda: client.post(
+                '/api/auth/login/', {'email': user.email, 'password': PASSWORD}, content_type='application/json')),
+            ('register', BUDGETS['register'], lambda: client.post(
+                '/api/auth/register/', {'email': 'budget-new@example.com', 'password': PASSWORD},
+                content_type='application/json')),
+            ('logout', BUDGETS['logout'], lambda: client.post(
+                '/api/auth/logout/', HTTP_AUTHORIZATION=f'Bearer {token}')),
+        ]
+
+        for model in admin.site._registry:
+            url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            checks.append((f'admin list {model._meta.label}', BUDGETS['admin list'],
+                           lambda url=url: admin_client.get(url)))
+
+        failures = []
+        for name, budget, request in checks:
+            try:
+                with assert_query_budget(budget, name) as stats:
+                    response = request()
+                status = self.style.SUCCESS('ok')
+            except AssertionError as e:
+                failures.append(str(e))
+                status = self.style.ERROR('OVER BUDGET')
+            if response.status_code >= 400:
+                failures.append(f'{name} returned HTTP {response.status_code}')
+                status = self.style.ERROR(f'HTTP {response.status_code}')
+            self.stdout.write(f'{name:<45}{stats.count:>4} / {budget:<4}{status}')
+        return failures
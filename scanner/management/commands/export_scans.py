@@ -0,0 +1,37 @@
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from scanner.utils.export import EXPORT_FORMATS, export_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Stream ScanResult history to a file or stdout as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--since', help='Only scans created on or after this ISO date/datetime')
+        parser.add_argument('--until', help='Only scans created up to this ISO date (inclusive) or datetime')
+        parser.add_argument('--risk-category', help='Only scans in this risk category')
+        parser.add_argument('--ssl-grade', help='Only scans with this SSL grade')
+        parser.add_argument('--chunk-size', type=int, default=settings.SCAN_EXPORT_CHUNK_SIZE,
+                            help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        try:
+            rows = export_rows(
+                since=options['since'],
+                until=options['until'],
+                risk_category=options['risk_category'],
+                ssl_grade=options['ssl_grade'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = iter_export(rows, options['output_format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                f.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Export written to {options['output']}"))
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from scanner.utils.retention import prune_scans, vacuum_scans
+
+
+class Command(BaseCommand):
+    help = 'Move scans past their SCAN_RETENTION_DAYS to the archive, keeping the latest scan of every domain'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SCAN_RETENTION_BATCH_SIZE,
+                            help='Scans moved per transaction')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to pause between batches')
+        parser.add_argument('--no-archive', action='store_true',
+                            help='Delete without copying to ScanResultArchive (rollups of pruned days '
+                                 'can then no longer be rebuilt)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the scans that would be pruned')
+        parser.add_argument('--vacuum', action='store_true', help='VACUUM ANALYZE the scan table afterwards (PostgreSQL)')
+
+    def handle(self, *args, **options):
+        archive = settings.SCAN_RETENTION_ARCHIVE and not options['no_archive']
+        pruned = prune_scans(
+            batch_size=options['batch_size'],
+            archive=archive,
+            pause=options['sleep'],
+            dry_run=options['dry_run'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        for category, count in pruned.items():
+            self.stdout.write(f'{category:<10}{count:>10}')
+
+        total = sum(pruned.values())
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{total} scans would be pruned'))
+            return
+        if options['vacuum'] and total and vacuum_scans():
+            self.stdout.write('Vacuumed the scan table')
+        destination = 'archived' if archive else 'deleted'
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} scans ({destination})'))
@@ -0,0 +1,33 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from scanner.utils.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily risk rollups from ScanResult and its archive (all days by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (ISO date)')
+        parser.add_argument('--until', help='Last day to rebuild (ISO date, inclusive)')
+        parser.add_argument('--days', type=int,
+                            help='Rebuild only the last N days, e.g. as a periodic compaction job')
+
+    def handle(self, *args, **options):
+        since = until = None
+        if options['days']:
+            since = timezone.localdate() - timedelta(days=options['days'] - 1)
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid date: {options['since']}")
+        if options['until']:
+            until = parse_date(options['until'])
+            if until is None:
+                raise CommandError(f"Invalid date: {options['until']}")
+
+        categories, domains = rebuild_rollups(since=since, until=until)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {categories} category rows and {domains} domain rows'
+        ))
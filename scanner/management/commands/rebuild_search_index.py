@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from scanner.models import CommunityStory
+from scanner.utils.search import index_story
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the StoryToken search index of all community stories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        indexed = 0
+        for story in CommunityStory.objects.order_by('pk').iterator(chunk_size=options['chunk_size']):
+            index_story(story)
+            indexed += 1
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} stories'))
@@ -0,0 +1,101 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from scanner.models import ScanResult
+from scanner.utils.risk_engine import categorize_batch, score_batch
+from scanner.utils.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute risk scores of stored scans with the current weight table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows read, scored and written per batch')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count changed rows without writing them')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.perf_counter()
+        scanned = changed = 0
+        last_pk = 0
+        changed_days = set()
+
+        # Keyset pagination on pk streams the table in constant memory
+        while True:
+            rows = list(
+                ScanResult.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', 'ssl_grade', 'domain_age', 'ssl_valid', 'report_card', 'risk_level', 'created_at'
+                )[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            scanned += len(rows)
+
+            updates, days = self.rescore(rows)
+            changed += len(updates)
+            changed_days |= days
+            if updates and not options['dry_run']:
+                with transaction.atomic():
+                    ScanResult.objects.bulk_update(
+                        updates,
+                        ['risk_level', 'risk_category', 'security_score', 'trust_score', 'updated_at'],
+                    )
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{scanned} rows scanned, {changed} changed ({scanned / elapsed:.0f} rows/s)')
+
+        # Category counts and top domains of the touched days follow the new scores
+        if changed_days and not options['dry_run']:
+            rebuild_rollups(since=min(changed_days), until=max(changed_days))
+            self.stdout.write(f'Rebuilt rollups from {min(changed_days)} to {max(changed_days)}')
+
+        verb = 'would change' if options['dry_run'] else 'updated'
+        self.stdout.write(self.style.SUCCESS(f'Done: {scanned} rows scanned, {changed} {verb}'))
+
+    def rescore(self, rows):
+        """
+        Score one chunk as columns and return the ScanResult instances whose
+        score changed, plus the set of days those scans were created on
+        """
+        pks, grades, ages, ssl_valid, report_cards, old_scores, created = zip(*rows)
+        ssl_info = [(card or {}).get('ssl', {}) for card in report_cards]
+
+        # Rows saved before report_card['ssl'] existed have no expiry: a failed SSL
+        # check scored it as 0 days (like calculate_risk), a valid one is unknown
+        expiry = np.array([
+            info.get('days_until_expiry', np.nan if valid else 0)
+            for info, valid in zip(ssl_info, ssl_valid)
+        ], dtype=np.float64)
+
+        scores = score_batch(
+            grades,
+            ages,
+            [info.get('protocol') for info in ssl_info],
+            expiry,
+            [info.get('unknown', False) for info in ssl_info],
+        )
+        # Block/allow list verdicts were not computed from probe data - keep them
+        listed = np.array([bool((card or {}).get('reputation')) for card in report_cards])
+        scores = np.where(listed, np.asarray(old_scores), scores)
+        categories = categorize_batch(scores)
+
+        now = timezone.now()
+        updates = []
+        days = set()
+        for index in np.flatnonzero(scores != np.asarray(old_scores)):
+            score = int(scores[index])
+            days.add(timezone.localdate(created[index]))
+            updates.append(ScanResult(
+                pk=pks[index],
+                risk_level=score,
+                risk_category=str(categories[index]),
+                security_score=100 - score,
+                trust_score=max(0, 100 - score),
+                updated_at=now,
+            ))
+        return updates, days
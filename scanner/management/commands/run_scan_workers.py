@@ -0,0 +1,55 @@
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from scanner.utils.job_queue import requeue_stale_jobs, work
+
+
+class Command(BaseCommand):
+    help = 'Run a pool of workers that process queued scan jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.SCAN_JOB_WORKERS,
+                            help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=settings.SCAN_JOB_POLL_SECONDS,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty instead of polling')
+
+    def requeue(self):
+        close_old_connections()
+        requeued, failed = requeue_stale_jobs(settings.SCAN_JOB_STALE_SECONDS, settings.SCAN_JOB_MAX_ATTEMPTS)
+        if requeued or failed:
+            self.stdout.write(f'Requeued {requeued} stale jobs, failed {failed} after too many attempts')
+
+    def handle(self, *args, **options):
+        self.requeue()
+
+        stop_event = threading.Event()
+        threads = [
+            threading.Thread(
+                target=work,
+                args=(stop_event, options['poll_interval'], options['burst']),
+                name=f'scan-worker-{i}',
+                daemon=True,
+            )
+            for i in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {len(threads)} scan workers")
+
+        # Jobs of workers that crash while this one runs are requeued periodically
+        next_requeue = time.monotonic() + settings.SCAN_JOB_REQUEUE_SECONDS
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(1)
+                if time.monotonic() >= next_requeue:
+                    self.requeue()
+                    next_requeue = time.monotonic() + settings.SCAN_JOB_REQUEUE_SECONDS
+        except KeyboardInterrupt:
+            stop_event.set()
+            self.stdout.write('Stopping scan workers...')
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:01
+
+from django.db import migrations, models
+from backend.migration_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('scanner', '0002_alter_scanresult_options_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='scanresult',
+            index=models.Index(fields=['domain', '-created_at'], name='scan_domain_created_idx'),
+        ),
+    ]
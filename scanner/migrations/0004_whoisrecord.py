@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0003_scanresult_domain_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhoisRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain', models.CharField(help_text='Registrable domain', max_length=255, unique=True)),
+                ('created', models.DateField(help_text='Domain creation date')),
+                ('registrar', models.CharField(blank=True, max_length=255)),
+                ('expiration', models.DateField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0005_scanjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDomainRisk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('domain', models.CharField(max_length=255)),
+                ('max_risk', models.IntegerField()),
+                ('scans', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', '-max_risk'],
+                'indexes': [models.Index(fields=['day', '-max_risk'], name='domainrisk_day_risk_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'domain'), name='domainrisk_day_domain_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRiskRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('risk_category', models.CharField(choices=[('low', 'Low Risk'), ('medium', 'Medium Risk'), ('high', 'High Risk'), ('critical', 'Critical Risk')], max_length=20)),
+                ('ssl_grade', models.CharField(max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'risk_category', 'ssl_grade'), name='rollup_day_category_grade_uniq')],
+            },
+        ),
+    ]
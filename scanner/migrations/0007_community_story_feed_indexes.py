@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:18
+
+from django.conf import settings
+from django.db import migrations, models
+from backend.migration_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('scanner', '0006_daily_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='communitystory',
+            index=models.Index(fields=['status', 'is_public', '-created_at', '-id'], name='story_feed_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='communitystory',
+            index=models.Index(fields=['scam_type', 'status', 'is_public', '-created_at', '-id'], name='story_type_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0007_community_story_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoryToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255)),
+                ('story', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='scanner.communitystory')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'story'), name='storytoken_token_story_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+from backend.migration_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('scanner', '0008_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='communityreport',
+            index=models.Index(fields=['-created_at'], name='community_report_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='communityreport',
+            index=models.Index(fields=['accurate', '-created_at'], name='community_report_accurate_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='scanjob',
+            index=models.Index(fields=['created_at'], name='scanjob_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='scanresult',
+            index=models.Index(fields=['-created_at'], name='scan_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='scanresult',
+            index=models.Index(fields=['risk_category', '-created_at'], name='scan_category_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='scanresult',
+            index=models.Index(fields=['ssl_grade', '-created_at'], name='scan_grade_created_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='securityreport',
+            index=models.Index(fields=['-created_at'], name='report_created_idx'),
+        ),
+    ]
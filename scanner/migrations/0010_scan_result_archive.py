@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0009_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanResultArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scan_id', models.BigIntegerField(help_text='id of the pruned ScanResult', unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('domain', models.CharField(blank=True, max_length=255)),
+                ('risk_level', models.IntegerField()),
+                ('risk_category', models.CharField(choices=[('low', 'Low Risk'), ('medium', 'Medium Risk'), ('high', 'High Risk'), ('critical', 'Critical Risk')], max_length=20)),
+                ('ssl_grade', models.CharField(max_length=10)),
+                ('domain_age', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='archive_created_idx'), models.Index(fields=['domain', '-created_at'], name='archive_domain_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# PostgreSQL only: full-text GIN index over story text and trigram indexes for
+# substring search on scan URLs/domains. SQLite uses the StoryToken table.
+# Built CONCURRENTLY so the large tables stay writable; IF NOT EXISTS keeps
+# this a no-op where the indexes already exist.
+POSTGRES_INDEXES = [
+    ('story_fts_idx',
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS story_fts_idx ON scanner_communitystory USING GIN "
+     "(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(story, '')))"),
+    ('scan_url_trgm_idx',
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS scan_url_trgm_idx ON scanner_scanresult "
+     "USING GIN (lower(url) gin_trgm_ops)"),
+    ('scan_domain_trgm_idx',
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS scan_domain_trgm_idx ON scanner_scanresult "
+     "USING GIN (lower(domain) gin_trgm_ops)"),
+]
+
+
+def create_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for _, sql in POSTGRES_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('scanner', '0010_scan_result_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:09
+
+from django.db import migrations, models
+from backend.migration_operations import AddIndexConcurrentlyOnPostgres, RemoveIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('scanner', '0011_search_indexes_concurrently'),
+    ]
+
+    # The new index is built before the old one is dropped, so the top
+    # domains query always has an index to use
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='dailydomainrisk',
+            index=models.Index(fields=['day', '-max_risk', '-scans'], name='domainrisk_day_risk_scans_idx'),
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='dailydomainrisk',
+            name='domainrisk_day_risk_idx',
+        ),
+    ]
@@ -1,18 +1,31 @@
+from datetime import date, timedelta
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.validators import URLValidator
 from django.core.exceptions import ValidationError
 import re
 from urllib.parse import urlparse
 
+SSL_GRADES = ['A+', 'A', 'B', 'C', 'F', 'N/A']
+
 def validate_ssl_grade(value):
     """Validate that SSL grade follows the correct format"""
-    valid_grades = ['A+', 'A', 'B', 'C', 'F', 'N/A']
-    if value not in valid_grades:
+    if value not in SSL_GRADES:
         raise ValidationError(
-            f'Invalid SSL grade. Must be one of: {", ".join(valid_grades)}'
+            f'Invalid SSL grade. Must be one of: {", ".join(SSL_GRADES)}'
         )
 
+def get_risk_category(risk_level):
+    """Map a 0-100 risk level to its risk category"""
+    if risk_level >= 80:
+        return 'critical'
+    elif risk_level >= 60:
+        return 'high'
+    elif risk_level >= 30:
+        return 'medium'
+    return 'low'
+
 class ScanResult(models.Model):
     # URL information
     url = models.URLField(max_length=500)
@@ -89,19 +102,46 @@ class ScanResult(models.Model):
             self.domain = parsed_url.netloc
         
         # Auto-set risk category based on risk_level
-        if self.risk_level >= 80:
-            self.risk_category = 'critical'
-        elif self.risk_level >= 60:
-            self.risk_category = 'high'
-        elif self.risk_level >= 30:
-            self.risk_category = 'medium'
-        else:
-            self.risk_category = 'low'
-            
+        self.risk_category = get_risk_category(self.risk_level)
+        
         super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Freshness-window lookups: latest scan of a domain
+            models.Index(fields=['domain', '-created_at'], name='scan_domain_created_idx'),
+            # Admin changelist: newest first, date hierarchy and the list filters
+            models.Index(fields=['-created_at'], name='scan_created_idx'),
+            models.Index(fields=['risk_category', '-created_at'], name='scan_category_created_idx'),
+            models.Index(fields=['ssl_grade', '-created_at'], name='scan_grade_created_idx'),
+        ]
+
+
+class ScanResultArchive(models.Model):
+    """
+    Compact copy of a ScanResult removed by prune_scans: the verdict columns
+    without report_card. Kept so history and rebuild_rollups still see it.
+    """
+    scan_id = models.BigIntegerField(unique=True, help_text="id of the pruned ScanResult")
+    url = models.URLField(max_length=500)
+    domain = models.CharField(max_length=255, blank=True)
+    risk_level = models.IntegerField()
+    risk_category = models.CharField(max_length=20, choices=ScanResult.RISK_CATEGORY_CHOICES)
+    ssl_grade = models.CharField(max_length=10)
+    domain_age = models.IntegerField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.url} - Risk: {self.risk_level}% (archived)"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='archive_created_idx'),
+            models.Index(fields=['domain', '-created_at'], name='archive_domain_created_idx'),
+        ]
 
 
 class SecurityReport(models.Model):
@@ -123,6 +163,11 @@ class SecurityReport(models.Model):
     
     def __str__(self):
         return f"Security Report for {self.scan_result.url}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='report_created_idx'),
+        ]
 
 
 class CommunityReport(models.Model):
@@ -137,6 +182,12 @@ class CommunityReport(models.Model):
     def __str__(self):
         status = "Accurate" if self.accurate else "Inaccurate"
         return f"Community Report for {self.scan_result.url} - {status}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='community_report_created_idx'),
+            models.Index(fields=['accurate', '-created_at'], name='community_report_accurate_idx'),
+        ]
 
 
 class CommunityStory(models.Model):
@@ -229,4 +280,136 @@ class CommunityStory(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Community Story"
-        verbose_name_plural = "Community Stories"
\ No newline at end of file
+        verbose_name_plural = "Community Stories"
+        indexes = [
+            # Public feed: keyset pagination on (created_at, id) within the visible stories
+            models.Index(fields=['status', 'is_public', '-created_at', '-id'], name='story_feed_idx'),
+            models.Index(fields=['scam_type', 'status', 'is_public', '-created_at', '-id'], name='story_type_feed_idx'),
+        ]
+
+
+class WhoisRecord(models.Model):
+    """Stored WHOIS data per registrable domain, so scans skip live registry queries"""
+    domain = models.CharField(max_length=255, unique=True, help_text="Registrable domain")
+    created = models.DateField(help_text="Domain creation date")
+    registrar = models.CharField(max_length=255, blank=True)
+    expiration = models.DateField(null=True, blank=True)
+    
+    fetched_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.domain} - created {self.created}"
+    
+    def age_years(self):
+        return int((date.today() - self.created).days / 365.25)
+    
+    def needs_refresh(self, refresh_days, min_interval):
+        """
+        Refresh only when the registration is close to (or past) expiry, and
+        at most once per min_interval - a dropped domain keeps its old expiry
+        """
+        if self.expiration is None:
+            return False
+        if self.fetched_at > timezone.now() - min_interval:
+            return False
+        return self.expiration <= date.today() + timedelta(days=refresh_days)
+    
+    def as_domain_data(self):
+        """Same shape as a live get_domain_age result"""
+        return {
+            'age': self.age_years(),
+            'created': self.created.strftime('%Y-%m-%d'),
+            'registrar': self.registrar or 'Unknown',
+            'expiration': self.expiration.strftime('%Y-%m-%d') if self.expiration else 'Unknown'
+        }
+
+
+
+class ScanJob(models.Model):
+    """Scan submitted for background processing by the run_scan_workers command"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    url = models.URLField(max_length=500)
+    domain = models.CharField(max_length=255)
+    refresh = models.BooleanField(default=False, help_text="Skip cached probe results")
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    result = models.ForeignKey(ScanResult, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Scan job {self.id} - {self.url} - {self.status}"
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Workers claim the oldest queued job
+            models.Index(fields=['status', 'created_at'], name='scanjob_status_created_idx'),
+            # Admin changelist in model order
+            models.Index(fields=['created_at'], name='scanjob_created_idx'),
+        ]
+
+
+class DailyRiskRollup(models.Model):
+    """Scan counts per day, risk category and SSL grade - maintained by scanner.utils.rollups"""
+    day = models.DateField()
+    risk_category = models.CharField(max_length=20, choices=ScanResult.RISK_CATEGORY_CHOICES)
+    ssl_grade = models.CharField(max_length=10)
+    count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.day} - {self.risk_category} / {self.ssl_grade}: {self.count}"
+    
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'risk_category', 'ssl_grade'], name='rollup_day_category_grade_uniq'),
+        ]
+
+
+class DailyDomainRisk(models.Model):
+    """Highest risk level seen per domain and day, for the top risky domains list"""
+    day = models.DateField()
+    domain = models.CharField(max_length=255)
+    max_risk = models.IntegerField()
+    scans = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.day} - {self.domain}: {self.max_risk}"
+    
+    class Meta:
+        ordering = ['-day', '-max_risk']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'domain'], name='domainrisk_day_domain_uniq'),
+        ]
+        indexes = [
+            # Top risky domains of a day, ties broken by scans
+            models.Index(fields=['day', '-max_risk', '-scans'], name='domainrisk_day_risk_scans_idx'),
+        ]
+
+
+class StoryToken(models.Model):
+    """
+    Search index entry for a community story: phone/domain mentions on every
+    database, plus plain words where there is no PostgreSQL full-text index
+    """
+    story = models.ForeignKey(CommunityStory, on_delete=models.CASCADE, related_name='tokens')
+    token = models.CharField(max_length=255)
+    
+    def __str__(self):
+        return f"{self.token} -> story {self.story_id}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'story'], name='storytoken_token_story_uniq'),
+        ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import CommunityStory, ScanResult
+from .utils.rollups import record_scans
+from .utils.search import index_story
+from .utils.story_feed import invalidate_first_pages
+
+
+@receiver(post_save, sender=ScanResult)
+def add_scan_to_rollups(sender, instance, created, **kwargs):
+    """Count each new scan in the daily rollups once its insert has committed"""
+    if created and settings.SCAN_ROLLUPS_ON_SAVE:
+        transaction.on_commit(lambda: record_scans([instance]))
+
+
+@receiver(post_save, sender=CommunityStory)
+@receiver(post_delete, sender=CommunityStory)
+def invalidate_story_feed(sender, instance, **kwargs):
+    """A new, edited or moderated story changes the cached first feed pages"""
+    transaction.on_commit(invalidate_first_pages)
+
+
+@receiver(post_save, sender=CommunityStory)
+def index_story_for_search(sender, instance, **kwargs):
+    """Refresh the story's search tokens (phone/domain mentions, words on SQLite)"""
+    transaction.on_commit(lambda: index_story(instance))
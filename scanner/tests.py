@@ -0,0 +1,570 @@
+import asyncio
+import socket
+import ssl
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from asgiref.sync import iscoroutinefunction
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from backend import shared_cache as shared_cache_module
+from benchmarks.tls_server import LocalTLSServer, make_self_signed_cert
+from backend.lru_cache import LRUCache
+from backend.query_budget import QueryBudgetMiddleware, assert_query_budget
+from backend.shared_cache import check_shared_caches, shared_cache
+from scanner.management.commands.check_query_budgets import BUDGETS, PASSWORD, create_sample_data
+from scanner.models import CommunityReport, CommunityStory, ScanJob, ScanResult, ScanResultArchive, SecurityReport, WhoisRecord
+from scanner.utils.domain_checker import get_domain_age
+from scanner.utils.export import csv_safe
+from scanner.utils import rate_limit, reputation
+from scanner.utils.job_queue import requeue_stale_jobs
+from scanner.utils.lexical import DEFAULT_KEYWORDS, KeywordAutomaton, LexicalAnalyzer, SuffixTrie
+from scanner.utils.probe_runner import get_executor, run_probes, run_probes_async
+from scanner.utils.retention import prune_scans
+from scanner.utils.rollups import get_risk_stats, rebuild_rollups, record_scans
+from scanner.utils.result_cache import ProbeCache, get_probe_cache
+from scanner.utils.scan_pipeline import build_scan_fields, flight_key, is_reusable
+from scanner.utils.single_flight import SingleFlight
+from scanner.utils.story_feed import fetch_page
+from scanner.utils.timing import ScanTimer
+from scanner.utils.tls_engine import TLSProbeEngine
+from scanner.views import reuses_recent_scans, wants_fresh_scan
+
+
+class AssertQueryBudgetTests(TestCase):
+    def test_within_budget(self):
+        with assert_query_budget(1) as stats:
+            ScanJob.objects.exists()
+        self.assertEqual(stats.count, 1)
+
+    def test_over_budget_lists_the_sql(self):
+        with self.assertRaisesMessage(AssertionError, 'jobs ran 2 queries, budget is 1'):
+            with assert_query_budget(1, 'jobs'):
+                ScanJob.objects.exists()
+                ScanJob.objects.count()
+
+
+class ViewQueryBudgetTests(TestCase):
+    """The budgets of check_query_budgets, against the same sample data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.scans = create_sample_data()
+        cls.job_id = ScanJob.objects.values_list('id', flat=True).first()
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def assertBudget(self, name, request):
+        with assert_query_budget(BUDGETS[name], name):
+            response = request()
+        self.assertLess(response.status_code, 400, response.content)
+        return response
+
+    def login(self):
+        return self.client.post('/api/auth/login/', {'email': self.user.email, 'password': PASSWORD},
+                                content_type='application/json')
+
+    def test_scan_recent_verdict(self):
+        response = self.assertBudget('scan (recent verdict)', lambda: self.client.post(
+            '/api/scan/', {'url': self.scans[0].url}, content_type='application/json'))
+        self.assertTrue(response.json()['cached'])
+
+    def test_scan_job_status(self):
+        self.assertBudget('scan job status', lambda: self.client.get(f'/api/scan/jobs/{self.job_id}/'))
+
+    def test_story_feed(self):
+        self.assertBudget('story feed', lambda: self.client.get('/api/scan/stories/'))
+
+    def test_search(self):
+        self.client.force_login(self.staff())
+        response = self.assertBudget('search', lambda: self.client.get('/api/scan/search/?q=phishing mail'))
+        self.assertIn('scans', response.json())
+
+    def test_search_hides_scanned_urls_from_anonymous_users(self):
+        response = self.client.get('/api/scan/search/?q=budget')
+        self.assertEqual(list(response.json()), ['query', 'stories'])
+        self.assertEqual(self.client.get('/api/scan/search/?q=budget&type=scans').status_code, 403)
+
+    def test_search_scans_needs_three_characters(self):
+        self.client.force_login(self.staff())
+        self.assertEqual(self.client.get('/api/scan/search/?q=bu&type=scans').status_code, 400)
+        self.assertNotIn('scans', self.client.get('/api/scan/search/?q=bu').json())
+
+    def test_risk_stats_default_range(self):
+        self.assertBudget('risk stats', lambda: self.client.get('/api/scan/stats/'))
+
+    def test_login(self):
+        self.assertBudget('login', self.login)
+
+    def test_register(self):
+        self.assertBudget('register', lambda: self.client.post(
+            '/api/auth/register/', {'email': 'budget-new@example.com', 'password': PASSWORD},
+            content_type='application/json'))
+
+    def test_logout(self):
+        token = self.login().json()['token']
+        self.assertBudget('logout', lambda: self.client.post(
+            '/api/auth/logout/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+
+    def staff(self):
+        return User.objects.create_superuser('budget-admin', 'budget-admin@example.com', PASSWORD)
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.staff())
+        for model in admin.site._registry:
+            with self.subTest(model=model._meta.label):
+                url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+                self.assertBudget('admin list', lambda: self.client.get(url))
+
+
+@override_settings(QUERY_BUDGET_HEADERS=True)
+class QueryBudgetMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.scan = ScanResult.objects.create(
+            url='https://budget.example.com/', risk_level=10, ssl_grade='A', domain_age=1, report_card={},
+        )
+        record_scans([cls.scan])  # The on_commit hook does not run inside a TestCase
+
+    @override_settings(QUERY_BUDGET_MAX_QUERIES=1)
+    def test_headers_flag_requests_over_budget(self):
+        response = self.client.get('/api/scan/stats/')
+        self.assertEqual(response['X-DB-Queries'], '2')
+        self.assertEqual(response['X-DB-Budget-Exceeded'], '1')
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_async_chain_stays_async(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(QueryBudgetMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(QueryBudgetMiddleware(lambda request: HttpResponse())))
+
+    async def test_async_view_queries_are_counted(self):
+        response = await self.async_client.post(
+            '/api/scan/async/', {'url': self.scan.url}, content_type='application/json')
+        self.assertTrue(response.json()['cached'])
+        self.assertEqual(response['X-DB-Queries'], '1')
+
+
+class FreshScanTests(SimpleTestCase):
+    def test_only_fresh_param_bypasses_the_probe_cache(self):
+        self.assertTrue(wants_fresh_scan(RequestFactory().post('/api/scan/?fresh=1')))
+        with self.settings(SCAN_FRESHNESS_MINUTES=0):
+            self.assertFalse(wants_fresh_scan(RequestFactory().post('/api/scan/')))
+
+    def test_disabled_window_skips_recent_rows(self):
+        self.assertTrue(reuses_recent_scans(False))
+        self.assertFalse(reuses_recent_scans(True))
+        with self.settings(SCAN_FRESHNESS_MINUTES=0):
+            self.assertFalse(reuses_recent_scans(False))
+
+
+@override_settings(SCAN_RETENTION_DAYS={'low': 30, 'medium': 0, 'high': 0, 'critical': 0})
+class PruneScansTests(TestCase):
+    def scan(self, domain, days_ago):
+        scan = ScanResult.objects.create(
+            url=f'https://{domain}/', risk_level=0, ssl_grade='A', domain_age=1000, report_card={},
+        )
+        ScanResult.objects.filter(pk=scan.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return scan
+
+    def test_prunes_old_rows_in_keyset_batches(self):
+        old = [self.scan('old.example.com', days) for days in (90, 80, 70, 60)]
+        latest = self.scan('old.example.com', 50)
+        SecurityReport.objects.create(scan_result=old[1], recommendations='Keep')
+        CommunityReport.objects.create(scan_result=old[2], comments='Keep')
+
+        self.assertEqual(prune_scans(batch_size=1, pause=0), {'low': 2})
+        self.assertEqual(
+            set(ScanResult.objects.values_list('id', flat=True)), {old[1].id, old[2].id, latest.id},
+        )
+        self.assertEqual(set(ScanResultArchive.objects.values_list('scan_id', flat=True)), {old[0].id, old[3].id})
+
+
+class WhoisRefreshTests(TestCase):
+    def test_expiring_record_is_refreshed_once_per_interval(self):
+        record = WhoisRecord.objects.create(
+            domain='expired.example.com', created='2000-01-01', expiration=timezone.localdate() - timedelta(days=1),
+        )
+        self.assertFalse(record.needs_refresh(30, timedelta(hours=24)))
+        WhoisRecord.objects.filter(pk=record.pk).update(fetched_at=timezone.now() - timedelta(hours=25))
+        record.refresh_from_db()
+        self.assertTrue(record.needs_refresh(30, timedelta(hours=24)))
+
+
+class WhoisStoreTests(TransactionTestCase):
+    def test_stored_record_is_served_on_a_probe_thread(self):
+        WhoisRecord.objects.create(domain='stored-whois.com', created='2000-01-01', registrar='Registrar')
+        domain_data = get_executor().submit(get_domain_age, 'www.stored-whois.com').result()
+        self.assertEqual(domain_data['created'], '2000-01-01')
+        self.assertEqual(domain_data['registrar'], 'Registrar')
+
+
+class StoryFeedTests(TestCase):
+    def test_cursor_pages_through_stories_with_equal_timestamps(self):
+        stories = [
+            CommunityStory.objects.create(title=f'Story {i}', story='Text', scam_type='phishing', status='approved')
+            for i in range(5)
+        ]
+        CommunityStory.objects.update(created_at=timezone.now())
+        seen, cursor = [], None
+        while True:
+            page = fetch_page(cursor=cursor, limit=2)
+            seen += [story['id'] for story in page['results']]
+            cursor = page['nextCursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted((story.id for story in stories), reverse=True))
+
+
+class ScanTimerTests(SimpleTestCase):
+    def test_timed_out_stage_is_recorded_as_the_deadline(self):
+        timer = ScanTimer()
+        timer.record('whois', 0.5)
+        timer.expire(['tls', 'whois'], 8.0)
+        timer.record('tls', 12.0)  # The probe thread finishing after the deadline
+        self.assertEqual(timer.as_ms(), {'whois': 500.0, 'tls': 8000.0})
+
+
+class RequeueStaleJobsTests(TestCase):
+    def test_stale_jobs_are_requeued_until_max_attempts(self):
+        started_at = timezone.now() - timedelta(minutes=10)
+        retry = ScanJob.objects.create(url='https://a.example.com/', domain='a.example.com', status='running',
+                                       attempts=1, started_at=started_at)
+        poison = ScanJob.objects.create(url='https://b.example.com/', domain='b.example.com', status='running',
+                                        attempts=3, started_at=started_at)
+
+        self.assertEqual(requeue_stale_jobs(300, 3), (1, 1))
+        retry.refresh_from_db()
+        poison.refresh_from_db()
+        self.assertEqual(retry.status, 'queued')
+        self.assertEqual(poison.status, 'failed')
+
+
+class CsvExportTests(SimpleTestCase):
+    def test_formula_cells_are_quoted(self):
+        self.assertEqual(
+            csv_safe(['=HYPERLINK("x")', '+1', '-2', '@SUM(A1)', 'https://ok.example.com/', -3, None]),
+            ["'=HYPERLINK(\"x\")", "'+1", "'-2", "'@SUM(A1)", 'https://ok.example.com/', -3, None],
+        )
+
+
+def prime_probe_cache(domain, grade='A', age=2000):
+    """Cached probe results for a domain, so scanning it does no network I/O"""
+    cache = get_probe_cache()
+    cache.set('ssl', domain, {'valid': True, 'grade': grade, 'protocol': 'TLSv1.3', 'days_until_expiry': 90})
+    cache.set('whois', domain, {'age': age, 'created': '2019-01-01'})
+
+
+class ScanBatchTests(TestCase):
+    def test_invalid_urls_get_item_errors_in_input_order(self):
+        prime_probe_cache('batch-one.example.com')
+        prime_probe_cache('batch-two.example.com')
+        urls = ['http://', 'batch-one.example.com', 42, 'https://batch-two.example.com/a',
+                'https://:443', 'https://batch-one.example.com/b']
+        response = self.client.post('/api/scan/batch/', {'urls': urls}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual([result['url'] for result in data['results']],
+                         ['http://', 'batch-one.example.com', '', 'https://batch-two.example.com/a',
+                          'https://:443', 'https://batch-one.example.com/b'])
+        self.assertEqual([('error' in result) for result in data['results']],
+                         [True, False, True, False, True, False])
+        self.assertEqual(data['uniqueDomains'], 2)
+        self.assertEqual(ScanResult.objects.count(), 3)
+
+    def test_rejects_empty_or_oversized_batches(self):
+        self.assertEqual(self.client.post('/api/scan/batch/', {'urls': []},
+                                          content_type='application/json').status_code, 400)
+        with self.settings(SCAN_BATCH_MAX_URLS=2):
+            response = self.client.post('/api/scan/batch/', {'urls': ['a.com', 'b.com', 'c.com']},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        rate_limit._buckets.clear()
+        caches['shared'].clear()
+
+    def tearDown(self):
+        rate_limit._buckets.clear()
+
+    def test_bucket_refuses_at_burst_and_refills(self):
+        bucket = rate_limit.TokenBucket('test', per_second=20, burst=2)
+        self.assertEqual(bucket.take('client', 2), 0)
+        self.assertGreater(bucket.take('client'), 0)
+        time.sleep(0.06)
+        self.assertEqual(bucket.take('client'), 0)
+        with self.assertRaises(rate_limit.RateLimitCostError):
+            bucket.take('client', 3)
+
+    @override_settings(SCAN_RATE_LIMITS={'ip': (60, 5), 'user': (60, 1)})
+    def test_refused_request_takes_no_tokens(self):
+        request = RequestFactory().post('/api/scan/')
+        request.user = User.objects.create_user('limited', 'limited@example.com', PASSWORD)
+        self.assertEqual(rate_limit.check_rate_limit(request), 0)
+        self.assertGreater(rate_limit.check_rate_limit(request), 0)  # User bucket is empty
+        # The refusal left the IP bucket at 4 tokens, so 4 anonymous scans still pass
+        request.user = AnonymousUser()
+        self.assertEqual(rate_limit.check_rate_limit(request, 4), 0)
+
+    @override_settings(SCAN_RATE_LIMITS={'ip': (30, 10), 'user': (60, 20)})
+    def test_batches_have_their_own_budget(self):
+        for i in range(40):
+            prime_probe_cache(f'budget{i}.example.com')
+        response = self.client.post('/api/scan/batch/', {'urls': [f'budget{i}.example.com' for i in range(40)]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(rate_limit.check_rate_limit(RequestFactory().post('/api/scan/')), 0)
+
+
+class SharedCacheTests(SimpleTestCase):
+    @override_settings(SHARED_CACHE_WARN=True, SHARED_CACHE_REQUIRED=False)
+    def test_local_cache_is_used_with_a_warning_by_default(self):
+        shared_cache_module._warned.clear()
+        with self.assertLogs('backend.shared_cache', 'WARNING'):
+            self.assertIs(shared_cache('shared'), caches['shared'])
+        self.assertEqual({error.id for error in check_shared_caches()}, {'backend.W001'})
+
+    @override_settings(SHARED_CACHE_REQUIRED=True)
+    def test_local_cache_is_refused_when_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            shared_cache('shared')
+        self.assertEqual({error.id for error in check_shared_caches()}, {'backend.E001'})
+
+
+class RiskStatsTests(TestCase):
+    def test_top_domains_are_limited_per_day(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        for domain, risk, scans, when in [('a.example.com', 90, 1, None), ('b.example.com', 90, 2, None),
+                                          ('c.example.com', 50, 1, None), ('d.example.com', 70, 1, yesterday)]:
+            for _ in range(scans):
+                scan = ScanResult.objects.create(url=f'https://{domain}/', risk_level=risk, ssl_grade='A',
+                                                 domain_age=1, report_card={})
+                if when:
+                    ScanResult.objects.filter(pk=scan.pk).update(created_at=when)
+        rebuild_rollups()
+        rebuild_rollups()  # Rebuilding over existing rows replaces them
+
+        days = get_risk_stats(days=2, top=2)['days']
+        self.assertEqual([domain['domain'] for domain in days[0]['topRiskyDomains']],
+                         ['b.example.com', 'a.example.com'])
+        self.assertEqual([domain['domain'] for domain in days[1]['topRiskyDomains']], ['d.example.com'])
+        self.assertEqual(days[0]['total'], 4)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight, started, release = SingleFlight(), threading.Event(), threading.Event()
+        calls = []
+
+        def probe():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('example.com', probe)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(flight.do('example.com', probe)))
+        follower.start()
+        while not flight.shared:
+            time.sleep(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual((results, len(calls)), (['result', 'result'], 1))
+        self.assertEqual(flight.stats(), {'started': 1, 'shared': 1})
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        with self.assertRaises(ZeroDivisionError):
+            flight.do('example.com', lambda: 1 / 0)
+        self.assertEqual(flight.do('example.com', lambda: 'retried'), 'retried')
+
+    def test_refresh_probes_do_not_join_cached_ones(self):
+        self.assertEqual(flight_key('WWW.Example.com.', False), flight_key('example.com', False))
+        self.assertNotEqual(flight_key('example.com', True), flight_key('example.com', False))
+
+
+class TLSProbeEngineTests(SimpleTestCase):
+    """Against the local TLS server of the benchmarks - it listens on 127.0.0.1 only,
+    so the ::1 attempt for localhost fails and the IPv4 one has to win the race"""
+
+    def test_sync_and_async_handshakes(self):
+        with LocalTLSServer() as server:
+            engine = TLSProbeEngine(context=server.client_context())
+            cert, protocol = engine.handshake('localhost', server.port)
+            self.assertIn((('commonName', 'localhost'),), cert['subject'])
+            self.assertEqual(protocol, 'TLSv1.3')
+
+            engine = TLSProbeEngine(context=server.client_context())
+            cert, protocol = asyncio.run(engine.ahandshake('localhost', server.port))
+            self.assertIn((('commonName', 'localhost'),), cert['subject'])
+            self.assertIsNotNone(engine._dns.get(('localhost', server.port)))  # Async lookups are cached too
+
+    def test_certificate_is_read_from_each_handshake(self):
+        with LocalTLSServer(max_version=ssl.TLSVersion.TLSv1_2) as server, tempfile.TemporaryDirectory() as tmp:
+            new_cert, new_key = make_self_signed_cert(tmp, days=30)
+            context = server.client_context()
+            context.load_verify_locations(cafile=new_cert)
+            engine = TLSProbeEngine(context=context)
+            first, _ = engine.handshake('localhost', server.port)
+
+            # The server rotates its certificate but keeps its session cache,
+            # so only a full handshake shows the new one
+            server.context.load_cert_chain(new_cert, new_key)
+            second, _ = engine.handshake('localhost', server.port)
+            self.assertNotEqual(first['notAfter'], second['notAfter'])
+
+    def test_connect_fails_when_nothing_listens(self):
+        with socket.create_server(('127.0.0.1', 0)) as listener:
+            port = listener.getsockname()[1]
+        engine = TLSProbeEngine(connect_timeout=1)
+        with self.assertRaises(OSError):
+            engine.handshake('localhost', port)
+        with self.assertRaises(OSError):
+            asyncio.run(engine.ahandshake('localhost', port))
+
+
+class ReputationTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.blocklist = f'{tmp.name}/block.txt'
+        self.allowlist = f'{tmp.name}/allow.txt'
+        with open(self.blocklist, 'w') as f:
+            f.write('# Hosts-file and plain lines\n0.0.0.0 evil.tk\n*.phish.co.uk\nbad.safe.example.com\n')
+        with open(self.allowlist, 'w') as f:
+            f.write('safe.example.com\nevil.tk\n')
+
+    def test_parent_domains_match_and_most_specific_wins(self):
+        store = reputation.ReputationStore([self.blocklist], [self.allowlist])
+        self.assertEqual(store.lookup('login.evil.tk'), {'list': 'block', 'match': 'evil.tk'})
+        self.assertEqual(store.lookup('a.b.phish.co.uk'), {'list': 'block', 'match': 'phish.co.uk'})
+        self.assertEqual(store.lookup('www.safe.example.com'), {'list': 'allow', 'match': 'safe.example.com'})
+        self.assertEqual(store.lookup('x.bad.safe.example.com'), {'list': 'block', 'match': 'bad.safe.example.com'})
+        self.assertIsNone(store.lookup('example.com'))
+        self.assertIsNone(store.lookup('co.uk'))
+
+    def test_first_lookup_waits_for_the_feeds(self):
+        with self.settings(SCAN_BLOCKLIST_FILES=[self.blocklist], SCAN_ALLOWLIST_FILES=[]):
+            reputation._store = None
+            self.addCleanup(setattr, reputation, '_store', None)
+            self.assertEqual(reputation.lookup_reputation('evil.tk')['list'], 'block')
+            self.assertEqual(reputation.get_reputation_store().stats()['blocked'], 3)
+
+    def test_changed_feed_is_reloaded(self):
+        store = reputation.ReputationStore([self.blocklist], [], check_interval=0)
+        self.assertIsNone(store.lookup('new.example.net'))
+        with open(self.blocklist, 'a') as f:
+            f.write('new.example.net\n')
+        self.assertTrue(store.reload())
+        self.assertEqual(store.lookup('new.example.net')['list'], 'block')
+
+
+class RunProbesTests(SimpleTestCase):
+    def test_slow_and_failing_probes_become_unknown(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        started = time.monotonic()
+        results = run_probes({
+            'fast': lambda: {'grade': 'A'},
+            'slow': lambda: release.wait(5),
+            'broken': lambda: 1 / 0,
+        }, deadline=0.2)
+
+        self.assertLess(time.monotonic() - started, 2)  # One deadline for all probes
+        self.assertEqual(results['fast'], {'grade': 'A'})
+        self.assertEqual(results['slow'], {'unknown': True, 'error': 'Timed out after 0.2s'})
+        self.assertTrue(results['broken']['unknown'])
+        self.assertIn('division by zero', results['broken']['error'])
+
+    def test_async_probes_share_the_deadline(self):
+        async def answer():
+            return {'age': 10}
+
+        async def hang():
+            await asyncio.sleep(5)
+
+        results = asyncio.run(run_probes_async({'whois': answer(), 'ssl': hang()}, deadline=0.2))
+        self.assertEqual(results['whois'], {'age': 10})
+        self.assertTrue(results['ssl']['unknown'])
+
+    def test_partial_scan_is_saved_but_never_reused(self):
+        fields = build_scan_fields('https://slow.example.com/', 'slow.example.com',
+                                   {'unknown': True, 'error': 'Timed out after 8.0s'}, {'age': 12})
+        self.assertTrue(fields['report_card']['partial'])
+        self.assertFalse(is_reusable(ScanResult(report_card=fields['report_card'])))
+
+
+class ProbeCacheTests(SimpleTestCase):
+    def cache(self, max_entries=10):
+        return ProbeCache(LRUCache(max_entries), {'ssl': 60, 'whois': 60, 'error': 0.05})
+
+    def test_hits_are_marked_cached_and_keyed_by_normalized_domain(self):
+        cache = self.cache()
+        cache.set('ssl', 'WWW.Example.com.', {'grade': 'A'})
+        self.assertEqual(cache.get('ssl', 'example.com'), {'grade': 'A', 'cached': True})
+        self.assertIsNone(cache.get('whois', 'example.com'))
+        self.assertEqual(cache.stats()['hits'], {'ssl': 1, 'whois': 0})
+        self.assertEqual(cache.stats()['misses'], {'ssl': 0, 'whois': 1})
+
+    def test_errors_expire_sooner_and_unknown_results_are_not_cached(self):
+        cache = self.cache()
+        cache.set('ssl', 'down.example.com', {'grade': 'N/A', 'error': 'refused'})
+        cache.set('whois', 'slow.example.com', {'unknown': True, 'error': 'Timed out'})
+        self.assertIsNotNone(cache.get('ssl', 'down.example.com'))
+        self.assertIsNone(cache.get('whois', 'slow.example.com'))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('ssl', 'down.example.com'))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = self.cache(max_entries=2)
+        cache.set('ssl', 'a.com', {'grade': 'A'})
+        cache.set('ssl', 'b.com', {'grade': 'B'})
+        cache.get('ssl', 'a.com')
+        cache.set('ssl', 'c.com', {'grade': 'C'})
+        self.assertIsNone(cache.get('ssl', 'b.com'))
+        self.assertIsNotNone(cache.get('ssl', 'a.com'))
+        self.assertEqual(len(cache.backend), 2)
+
+
+class LexicalTests(SimpleTestCase):
+    def test_suffix_trie_wildcard_and_exception_rules(self):
+        trie = SuffixTrie(['com', 'co.uk', '*.ck', '!www.ck', '// comment'])
+        analyzer = LexicalAnalyzer(trie, KeywordAutomaton([]))
+        self.assertEqual(analyzer.registrable_domain('a.b.example.co.uk'), 'example.co.uk')
+        self.assertEqual(analyzer.registrable_domain('shop.example.com'), 'example.com')
+        self.assertEqual(analyzer.registrable_domain('a.b.example.ck'), 'b.example.ck')  # *.ck is a suffix
+        self.assertEqual(analyzer.registrable_domain('www.ck'), 'www.ck')  # Except www.ck
+        self.assertEqual(analyzer.registrable_domain('Example.UNLISTED.'), 'example.unlisted')  # Implicit *
+
+    def test_keyword_automaton_finds_overlapping_keywords(self):
+        automaton = KeywordAutomaton(['he', 'she', 'his', 'hers', 'free'])
+        self.assertEqual(automaton.find('ushers'), {'she', 'he', 'hers'})
+        self.assertEqual(automaton.find('freefree-his'), {'free', 'his'})
+        self.assertEqual(automaton.find('nothing'), set())
+
+    def test_keywords_in_the_public_suffix_are_not_matched(self):
+        analyzer = LexicalAnalyzer(SuffixTrie(['win', 'co.uk']), KeywordAutomaton(DEFAULT_KEYWORDS))
+        self.assertEqual(analyzer.analyze('example.win')['signals'], ['risky_tld'])
+        result = analyzer.analyze('claim-free-prize.a.b.example.co.uk')
+        self.assertEqual(result['keywords'], ['free', 'prize'])
+        self.assertEqual(result['signals'], ['long_domain', 'hyphen', 'deep_subdomain', 'suspicious_keyword'])
+        self.assertEqual(result['registrable'], 'example.co.uk')
@@ -3,4 +3,14 @@ from . import views
 
 urlpatterns = [
     path('', views.scan_url, name='scan_url'),  # Change this line
+    path('async/', views.scan_url_async, name='scan_url_async'),
+    path('batch/', views.scan_batch, name='scan_batch'),
+    path('jobs/', views.submit_scan_job, name='submit_scan_job'),
+    path('jobs/<int:job_id>/', views.scan_job_status, name='scan_job_status'),
+    path('cache-stats/', views.cache_stats, name='scan_cache_stats'),
+    path('metrics/', views.metrics, name='scan_metrics'),
+    path('stats/', views.risk_stats, name='risk_stats'),
+    path('stories/', views.story_feed, name='story_feed'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export_scans, name='export_scans'),
 ]
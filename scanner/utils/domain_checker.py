@@ -1,29 +1,120 @@
+import asyncio
+import socket
+import threading
 import whois
-from datetime import datetime
+from whois.parser import WhoisEntry
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from ..models import WhoisRecord
+from .probe_runner import get_executor, unknown_result
+from .rate_limit import take_whois_budget
+from .tls_engine import parse_address
+from .url_parser import registrable_domain
+
+# Registrable domains with a background refresh already queued
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+def first_date(value):
+    """WHOIS dates may be a list and timezone-aware - return one naive date"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None).date()
+    return None
+
+def query_whois_server(domain, address, timeout=10):
+    """Raw WHOIS query (RFC 3912) to one fixed server, parsed like whois.whois"""
+    with socket.create_connection(address, timeout=timeout) as sock:
+        sock.sendall(domain.encode('idna') + b'\r\n')
+        chunks = []
+        while chunk := sock.recv(4096):
+            chunks.append(chunk)
+    return WhoisEntry.load(domain, b''.join(chunks).decode('utf-8', 'replace'))
+
+def lookup_whois(domain):
+    """Live WHOIS query - returns creation date, registrar and expiration"""
+    server = parse_address(settings.SCAN_WHOIS_SERVER)
+    domain_info = query_whois_server(domain, server) if server else whois.whois(domain)
+
+    # Get creation date (handle cases where it might be a list)
+    creation_date = first_date(domain_info.creation_date)
+    if not creation_date:
+        raise ValueError('Creation date not found')
+
+    return {
+        'created': creation_date,
+        'registrar': domain_info.registrar or '',
+        'expiration': first_date(domain_info.expiration_date)
+    }
+
+def store_whois(domain, info):
+    record, _ = WhoisRecord.objects.update_or_create(domain=domain, defaults=info)
+    return record
+
+def refresh_whois(domain):
+    """
+    Re-query WHOIS for a stored domain; keep the old record if the lookup
+    fails, but mark it fetched so it is not retried before the refresh interval
+    """
+    # Runs on a probe-pool thread: drop a broken or expired connection first
+    close_old_connections()
+    try:
+        if take_whois_budget(domain):  # Over budget: retried on a later scan
+            try:
+                store_whois(domain, lookup_whois(domain))
+            except Exception:
+                WhoisRecord.objects.filter(domain=domain).update(fetched_at=timezone.now())
+    except Exception:
+        pass
+    finally:
+        close_old_connections()
+        with _refreshing_lock:
+            _refreshing.discard(domain)
+
+def schedule_refresh(domain):
+    with _refreshing_lock:
+        if domain in _refreshing:
+            return
+        _refreshing.add(domain)
+    get_executor().submit(refresh_whois, domain)
 
 def get_domain_age(domain):
+    """
+    Domain age from the WHOIS store, querying WHOIS for unknown domains.
+    Runs on a probe-pool thread, so like refresh_whois it drops a broken or
+    expired connection before the ORM work and again after it.
+    """
+    close_old_connections()
+    try:
+        return lookup_domain_age(domain)
+    finally:
+        close_old_connections()
+
+def lookup_domain_age(domain):
     try:
-        # Query WHOIS information
-        domain_info = whois.whois(domain)
-        
-        # Get creation date (handle cases where it might be a list)
-        creation_date = domain_info.creation_date
-        if isinstance(creation_date, list):
-            creation_date = creation_date[0]
-        
-        if creation_date:
-            # Calculate age in years
-            age_delta = datetime.now() - creation_date
-            age_years = age_delta.days / 365.25
-            
-            return {
-                'age': int(age_years),
-                'created': creation_date.strftime('%Y-%m-%d'),
-                'registrar': domain_info.registrar or 'Unknown',
-                'expiration': domain_info.expiration_date.strftime('%Y-%m-%d') if domain_info.expiration_date else 'Unknown'
-            }
-        else:
-            return {'age': 0, 'error': 'Creation date not found'}
-            
+        registrable = registrable_domain(domain)
+
+        # Read the persistent store first - creation dates almost never change
+        record = WhoisRecord.objects.filter(domain=registrable).first()
+        if record is None:
+            # Over the registry's budget the probe is skipped, not queued - the
+            # unknown result is not cached and the scan is saved as partial
+            if not take_whois_budget(registrable):
+                return unknown_result('WHOIS rate limit reached for this registry')
+            record = store_whois(registrable, lookup_whois(registrable))
+        elif record.needs_refresh(settings.SCAN_WHOIS_REFRESH_DAYS,
+                                  timedelta(hours=settings.SCAN_WHOIS_REFRESH_INTERVAL_HOURS)):
+            schedule_refresh(registrable)
+
+        return record.as_domain_data()
+
     except Exception as e:
-        return {'age': 0, 'error': str(e)}
\ No newline at end of file
+        return {'age': 0, 'error': str(e)}
+
+async def get_domain_age_async(domain):
+    """Run the blocking WHOIS lookup on the probe pool so the event loop stays free"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), get_domain_age, domain)
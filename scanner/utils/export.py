@@ -0,0 +1,110 @@
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from ..models import ScanResult
+
+# Columns written by the CSV/NDJSON export, in order
+EXPORT_FIELDS = (
+    'id', 'url', 'domain', 'risk_level', 'risk_category', 'ssl_grade', 'ssl_valid',
+    'domain_age', 'domain_created', 'security_score', 'trust_score', 'created_at',
+)
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows joined into one chunk before it is yielded to the response/file
+LINES_PER_CHUNK = 1000
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def parse_bound(value, end=False):
+    """
+    Parse an ISO date or datetime filter. A plain date used as the end of
+    the range includes that whole day. Raises ValueError when invalid.
+    """
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value}')
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_rows(since=None, until=None, risk_category=None, ssl_grade=None):
+    """Filtered ScanResult rows as tuples of EXPORT_FIELDS, oldest first"""
+    queryset = ScanResult.objects.all()
+    if since:
+        queryset = queryset.filter(created_at__gte=parse_bound(since))
+    if until:
+        queryset = queryset.filter(created_at__lt=parse_bound(until, end=True))
+    if risk_category:
+        queryset = queryset.filter(risk_category=risk_category)
+    if ssl_grade:
+        queryset = queryset.filter(ssl_grade=ssl_grade)
+    return queryset.order_by('pk').values_list(*EXPORT_FIELDS)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class _LineBuffer:
+    """File-like target for csv.writer that just returns what is written"""
+
+    def write(self, value):
+        return value
+
+
+def csv_safe(row):
+    """
+    Quote text cells that a spreadsheet would evaluate as formulas. Scanned
+    URLs are user input, so an admin opening the export must not run them.
+    """
+    return [
+        f"'{value}" if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value
+        for value in row
+    ]
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= LINES_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def iter_export(rows, export_format, chunk_size=2000):
+    """
+    Yield the export as text chunks. Rows are fetched through iterator(), which
+    uses a server-side cursor on PostgreSQL, so memory stays flat for any row count.
+    """
+    rows = rows.iterator(chunk_size=chunk_size)
+    if export_format == 'csv':
+        writer = csv.writer(_LineBuffer())
+        yield writer.writerow(EXPORT_FIELDS)
+        lines = (writer.writerow(csv_safe(row)) for row in rows)
+    else:
+        lines = (
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), default=_json_default) + '\n'
+            for row in rows
+        )
+    yield from _chunked(lines)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from ..models import ScanJob
+from .scan_pipeline import run_scan
+
+def enqueue_scan(url, domain, refresh=False):
+    return ScanJob.objects.create(url=url, domain=domain, refresh=refresh)
+
+def claim_job():
+    """
+    Atomically move the oldest queued job to 'running' and return it.
+
+    On Postgres, SELECT ... FOR UPDATE SKIP LOCKED lets many workers claim
+    jobs without blocking each other. Databases without it (SQLite in tests)
+    fall back to a conditional UPDATE, so a job is still claimed only once.
+    """
+    queued = ScanJob.objects.filter(status='queued').order_by('created_at')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = queued.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.status = 'running'
+            job.started_at = timezone.now()
+            job.attempts += 1
+            job.save(update_fields=['status', 'started_at', 'attempts'])
+            return job
+
+    while True:
+        job = queued.first()
+        if job is None:
+            return None
+        claimed = ScanJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', started_at=timezone.now(), attempts=job.attempts + 1
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+        # Another worker won the race - try the next job
+
+def run_job(job):
+    """Run one claimed job and record its result"""
+    try:
+        job.result, _, _ = run_scan(job.url, job.domain, refresh=job.refresh)
+        job.status = 'done'
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'status', 'error', 'finished_at'])
+
+def requeue_stale_jobs(stale_seconds, max_attempts):
+    """
+    Put jobs left 'running' by a crashed worker back on the queue, or mark
+    them failed once they have been tried max_attempts times - a URL that
+    crashes its worker every time must not loop forever.
+    Returns (requeued, failed).
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    stale = ScanJob.objects.filter(status='running', started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='failed', error=f'Gave up after {max_attempts} attempts', finished_at=timezone.now()
+    )
+    requeued = stale.update(status='queued')
+    return requeued, failed
+
+def work(stop_event, poll_interval, burst=False):
+    """Worker loop: claim and run jobs until stopped (or the queue is empty in burst mode)"""
+    while not stop_event.is_set():
+        close_old_connections()
+        job = claim_job()
+        if job is None:
+            if burst:
+                return
+            stop_event.wait(poll_interval)
+            continue
+        run_job(job)
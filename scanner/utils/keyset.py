@@ -0,0 +1,20 @@
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+
+def row_compare(model, fields, op, values):
+    """
+    Filter expression (f1, f2, ...) op (v1, v2, ...) for keyset pagination.
+    A row-value comparison is one index range on PostgreSQL (and SQLite),
+    where the equivalent Q(f1 > v1) | Q(f1 = v1, f2 > v2) is not.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns, params = [], []
+    for name, value in zip(fields, values):
+        field = model._meta.get_field(name)
+        columns.append(f'{table}.{quote(field.column)}')
+        params.append(field.get_db_prep_value(value, connection))
+    sql = f"({', '.join(columns)}) {op} ({', '.join(['%s'] * len(params))})"
+    return RawSQL(sql, params, output_field=BooleanField())
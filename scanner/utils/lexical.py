@@ -0,0 +1,208 @@
+from collections import deque
+
+# Built-in multi-label public suffixes. Any other TLD counts as a one-label
+# suffix (the implicit "*" rule). Point SCAN_PUBLIC_SUFFIX_FILE at a copy of
+# https://publicsuffix.org/list/public_suffix_list.dat for the full list.
+DEFAULT_SUFFIX_RULES = [
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'me.uk', 'net.uk',
+    'com.au', 'net.au', 'org.au', 'edu.au', 'gov.au',
+    'co.in', 'net.in', 'org.in', 'gov.in', 'ac.in',
+    'co.jp', 'ne.jp', 'or.jp', 'ac.jp', 'go.jp',
+    'co.nz', 'org.nz', 'co.za', 'org.za', 'co.kr', 'or.kr',
+    'com.br', 'net.br', 'org.br', 'com.cn', 'net.cn', 'org.cn',
+    'com.mx', 'com.sg', 'com.tr', 'com.hk', 'com.tw', 'com.ar', 'com.my',
+    'github.io', 'herokuapp.com', 'vercel.app', 'netlify.app', 'pages.dev',
+    'blogspot.com', 'appspot.com', 'web.app', 'firebaseapp.com', 'up.railway.app',
+]
+
+# Trustworthy TLDs (safer) and risky TLDs (more dangerous)
+GOOD_TLDS = {'com', 'org', 'edu', 'gov', 'net'}
+RISKY_TLDS = {'xyz', 'top', 'loan', 'win', 'club', 'click', 'tk', 'ml'}
+
+DEFAULT_KEYWORDS = ['free', 'win', 'prize', 'reward', 'click', 'limited', 'offer']
+
+# Points for each lexical signal (same weights as the legacy calculate_risk_level)
+SIGNAL_POINTS = {
+    'risky_tld': 25,
+    'trusted_tld': -10,
+    'long_domain': 15,
+    'hyphen': 10,
+    'deep_subdomain': 10,
+    'suspicious_keyword': 20,
+}
+
+_RULE = 'rule'
+_EXCEPTION = 'exception'
+_END = '$'  # Marker key; '$' is never a valid DNS label
+
+
+class SuffixTrie:
+    """Public suffix rules stored as a trie of reversed labels"""
+
+    def __init__(self, rules=()):
+        self.root = {}
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule):
+        rule = rule.strip().lower()
+        if not rule or rule.startswith('//'):
+            return
+        kind = _EXCEPTION if rule.startswith('!') else _RULE
+        node = self.root
+        for label in reversed(rule.lstrip('!').split('.')):
+            node = node.setdefault(label, {})
+        node[_END] = kind
+
+    def suffix_length(self, labels):
+        """Number of trailing labels that form the public suffix"""
+        node = self.root
+        matched = 1  # Implicit "*" rule: the TLD is always a suffix
+        for depth, label in enumerate(reversed(labels), 1):
+            child = node.get(label)
+            if child is not None and child.get(_END) == _EXCEPTION:
+                return depth - 1
+            if child is None:
+                child = node.get('*')
+            if child is None:
+                break
+            if _END in child:
+                matched = depth
+            node = child
+        return min(matched, len(labels))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(line.split()[0] for line in f if line.strip())
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton: finds every keyword in one pass over the text,
+    so the per-URL cost does not grow with the number of keywords.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        for keyword in keywords:
+            self._add(keyword.strip().lower())
+        self._build()
+
+    def _add(self, keyword):
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(keyword)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """Return the set of keywords that occur in text"""
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class LexicalAnalyzer:
+    """I/O-free domain heuristics, cheap enough to run before any network probe"""
+
+    def __init__(self, suffixes, keywords, risky_tlds=RISKY_TLDS, good_tlds=GOOD_TLDS):
+        self.suffixes = suffixes
+        self.keywords = keywords
+        self.risky_tlds = risky_tlds
+        self.good_tlds = good_tlds
+
+    def split(self, domain):
+        """Return (labels, suffix_length) for a host name"""
+        host = domain.strip().lower().rstrip('.').split(':')[0]
+        labels = host.split('.')
+        return labels, self.suffixes.suffix_length(labels)
+
+    def registrable_domain(self, domain):
+        labels, suffix_length = self.split(domain)
+        return '.'.join(labels[-(suffix_length + 1):])
+
+    def analyze(self, domain):
+        labels, suffix_length = self.split(domain)
+        host = '.'.join(labels)
+        name_labels = labels[:-suffix_length] if suffix_length < len(labels) else []
+
+        signals = []
+        tld = labels[-1]
+        if tld in self.risky_tlds:
+            signals.append('risky_tld')
+        elif tld in self.good_tlds:
+            signals.append('trusted_tld')
+        if len(host) > 30:  # Very long domains are suspicious
+            signals.append('long_domain')
+        if '-' in host:  # Hyphens can be suspicious
+            signals.append('hyphen')
+        if len(name_labels) > 2:  # Too many subdomains
+            signals.append('deep_subdomain')
+
+        # Keywords are matched outside the public suffix, so '.win' is a TLD signal only
+        keywords = self.keywords.find('.'.join(name_labels))
+        if keywords:
+            signals.append('suspicious_keyword')
+
+        return {
+            'registrable': '.'.join(labels[-(suffix_length + 1):]),
+            'suffix': '.'.join(labels[-suffix_length:]),
+            'signals': signals,
+            'keywords': sorted(keywords),
+            'score': sum(SIGNAL_POINTS[signal] for signal in signals),
+        }
+
+
+def read_keywords(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+_analyzer = None
+
+
+def get_lexical_analyzer():
+    """Return the process-wide analyzer, compiled once from settings"""
+    global _analyzer
+    if _analyzer is None:
+        from django.conf import settings
+        suffix_file = getattr(settings, 'SCAN_PUBLIC_SUFFIX_FILE', None)
+        keyword_file = getattr(settings, 'SCAN_KEYWORDS_FILE', None)
+        suffixes = SuffixTrie.from_file(suffix_file) if suffix_file else SuffixTrie(DEFAULT_SUFFIX_RULES)
+        keywords = DEFAULT_KEYWORDS + (read_keywords(keyword_file) if keyword_file else [])
+        _analyzer = LexicalAnalyzer(suffixes, KeywordAutomaton(keywords))
+    return _analyzer
+
+
+def analyze_domain(domain):
+    return get_lexical_analyzer().analyze(domain)
@@ -0,0 +1,62 @@
+import bisect
+import threading
+
+# Latency buckets in seconds, Prometheus style (le = "less than or equal")
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """In-process histogram with one series per label value"""
+
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = {
+                    'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0
+                }
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                series['counts'][index] += 1
+            series['sum'] += seconds
+            series['count'] += 1
+
+    def render(self):
+        """Prometheus text exposition lines for this histogram"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                labels = f'{self.label}="{label_value}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{labels}}} {series["sum"]:.6f}')
+                lines.append(f'{self.name}_count{{{labels}}} {series["count"]}')
+        return lines
+
+
+def render_counter(name, help_text, values, label=None):
+    """Prometheus text lines for a counter, optionally split by one label"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    if label is None:
+        lines.append(f'{name} {values}')
+    else:
+        lines.extend(f'{name}{{{label}="{key}"}} {value}' for key, value in sorted(values.items()))
+    return lines
+
+
+SCAN_STAGE_SECONDS = Histogram(
+    'scan_stage_duration_seconds',
+    'Time spent in each stage of the scan pipeline',
+    'stage',
+)
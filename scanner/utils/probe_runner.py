@@ -0,0 +1,66 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+
+_executor = None
+
+
+def get_executor():
+    """Return the shared probe thread pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        from django.conf import settings
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'SCAN_PROBE_WORKERS', 16),
+            thread_name_prefix='scan-probe'
+        )
+    return _executor
+
+
+def unknown_result(reason):
+    """Partial result for a probe that did not finish - scored as unknown"""
+    return {'unknown': True, 'error': reason}
+
+
+def run_probes(probes, deadline, executor=None):
+    """
+    Run independent probes in parallel under one overall deadline.
+
+    `probes` maps a name to a zero-argument callable. Returns a dict with the
+    same keys; probes that raise or miss the deadline get an unknown result
+    instead of failing the whole scan.
+    """
+    executor = executor or get_executor()
+    futures = {name: executor.submit(probe) for name, probe in probes.items()}
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            # Leave the thread to finish on its own socket timeout
+            future.cancel()
+            results[name] = unknown_result(f'Timed out after {deadline}s')
+        elif future.exception() is not None:
+            results[name] = unknown_result(str(future.exception()))
+        else:
+            results[name] = future.result()
+    return results
+
+
+async def run_probes_async(probes, deadline):
+    """
+    Async counterpart of run_probes: `probes` maps a name to a coroutine.
+    Coroutines still pending at the deadline are cancelled.
+    """
+    tasks = {name: asyncio.ensure_future(probe) for name, probe in probes.items()}
+    await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    for name, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            results[name] = unknown_result(f'Timed out after {deadline}s')
+        elif task.exception() is not None:
+            results[name] = unknown_result(str(task.exception()))
+        else:
+            results[name] = task.result()
+    return results
@@ -0,0 +1,141 @@
+import math
+import time
+from django.conf import settings
+from backend.shared_cache import shared_cache
+
+
+class RateLimitCostError(ValueError):
+    """A request costs more tokens than the bucket holds, so waiting would never admit it"""
+
+    def __init__(self, burst):
+        super().__init__(f'Request costs more than the burst of {burst} tokens')
+        self.burst = burst
+
+
+class TokenBucket:
+    """
+    Token bucket kept in a Django cache, so every worker process shares it.
+    The bucket is stored as one timestamp (GCRA): the time at which it will be
+    full again. Taking tokens moves that time forward, and a request is
+    refused when the bucket would have to be more than `burst` tokens behind.
+
+    get/set is not atomic, so concurrent workers may let a few extra requests
+    through at the limit. That is acceptable for abuse protection.
+    """
+
+    def __init__(self, name, per_second, burst):
+        self.name = name
+        self.interval = 1 / per_second if per_second > 0 else 0
+        self.burst = max(burst, 1)
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def _key(self, key):
+        return f'ratelimit:{self.name}:{key}'
+
+    def check(self, key, cost=1):
+        """
+        Return (retry_after, full_at) for taking `cost` tokens without taking
+        them: retry_after is 0 when allowed, and full_at is what commit stores.
+        A cost above `burst` raises RateLimitCostError.
+        """
+        if cost > self.burst:
+            raise RateLimitCostError(self.burst)
+        now = time.time()
+        full_at = max(shared_cache(settings.SCAN_RATE_LIMIT_CACHE).get(self._key(key)) or now, now)
+        new_full_at = full_at + cost * self.interval
+        allowed_at = new_full_at - self.burst * self.interval
+        return max(allowed_at - now, 0), new_full_at
+
+    def commit(self, key, full_at):
+        timeout = math.ceil(full_at - time.time()) + 1
+        shared_cache(settings.SCAN_RATE_LIMIT_CACHE).set(self._key(key), full_at, timeout=timeout)
+
+    def take(self, key, cost=1):
+        """
+        Take `cost` tokens. Returns 0 when allowed, else seconds until it
+        would be. A cost above `burst` raises RateLimitCostError.
+        """
+        if not self.enabled:
+            return 0
+        retry_after, full_at = self.check(key, cost)
+        if not retry_after:
+            self.commit(key, full_at)
+        return retry_after
+
+
+_buckets = {}
+
+
+def get_bucket(name):
+    """
+    'ip' and 'user' buckets from SCAN_RATE_LIMITS and 'batch_ip'/'batch_user'
+    from SCAN_BATCH_RATE_LIMITS (per minute), 'whois' from SCAN_WHOIS_RATE (per second)
+    """
+    if name not in _buckets:
+        if name == 'whois':
+            per_second, burst = settings.SCAN_WHOIS_RATE
+        else:
+            if name.startswith('batch_'):
+                per_minute, burst = settings.SCAN_BATCH_RATE_LIMITS[name[len('batch_'):]]
+            else:
+                per_minute, burst = settings.SCAN_RATE_LIMITS[name]
+            per_second = per_minute / 60
+        _buckets[name] = TokenBucket(name, per_second, burst)
+    return _buckets[name]
+
+
+def client_ip(request):
+    if settings.SCAN_RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_user_id(request):
+    """Id of the session or Bearer-token user, None for anonymous callers"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    from auth_app.authentication import JWTAuthentication
+    from rest_framework.exceptions import AuthenticationFailed
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0].pk if authenticated else None
+
+
+def check_rate_limit(request, cost=1, batch=False):
+    """
+    Charge a probing request to the caller's IP bucket and, when signed in, to
+    their user bucket - the batch buckets for a batch scan. Returns 0 when
+    allowed, else the Retry-After seconds. Tokens are taken from every bucket
+    or from none. Nothing is queued. A refused request must be answered right away.
+    Raises RateLimitCostError, before taking anything, when `cost` exceeds
+    the burst of either bucket.
+    """
+    prefix = 'batch_' if batch else ''
+    buckets = [(get_bucket(f'{prefix}ip'), client_ip(request))]
+    user_id = request_user_id(request)
+    if user_id is not None:
+        buckets.append((get_bucket(f'{prefix}user'), user_id))
+    # Check every bucket before committing any, so a refusal takes nothing
+    checks = [(bucket, key, *bucket.check(key, cost)) for bucket, key in buckets if bucket.enabled]
+    retry_after = max((retry_after for _, _, retry_after, _ in checks), default=0)
+    if retry_after:
+        return retry_after
+    for bucket, key, _, full_at in checks:
+        bucket.commit(key, full_at)
+    return 0
+
+
+def take_whois_budget(domain):
+    """
+    One token from the global WHOIS budget of the domain's registry. The
+    registry is approximated by the TLD, since each TLD has its own WHOIS server.
+    """
+    return get_bucket('whois').take(domain.rsplit('.', 1)[-1]) == 0
@@ -0,0 +1,198 @@
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from .lexical import get_lexical_analyzer
+
+# Risk level stored for a definitive reputation hit (no probes are run)
+VERDICT_RISK_LEVELS = {'block': 100, 'allow': 1}
+
+
+def domain_hash(domain):
+    """Stable 64-bit hash of a domain name"""
+    return int.from_bytes(hashlib.blake2b(domain.encode(), digest_size=8).digest(), 'little')
+
+
+def read_feed(path):
+    """
+    Yield domains from a feed file: one domain per line or hosts-file lines
+    ("0.0.0.0 evil.tk"). '#' and '!' start comments, '*.' prefixes are dropped.
+    """
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line or line.startswith('!'):
+                continue
+            domain = line.split()[-1].lower().rstrip('.')
+            if domain.startswith('*.'):
+                domain = domain[2:]
+            if '.' in domain:
+                yield domain
+
+
+class DomainSet:
+    """Sorted array of 64-bit domain hashes - 8 bytes per entry, binary search lookups"""
+
+    def __init__(self, domains=()):
+        hashes = np.fromiter((domain_hash(domain) for domain in domains), dtype=np.uint64)
+        self._hashes = np.unique(hashes)  # Sorted and deduplicated
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, domain):
+        return bool(self.contains_hashes(np.array([domain_hash(domain)], dtype=np.uint64))[0])
+
+    def contains_hashes(self, hashes):
+        """Membership of each hash in a uint64 array, with one binary search call"""
+        if not len(self._hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        index = np.searchsorted(self._hashes, hashes)
+        return self._hashes[np.minimum(index, len(self._hashes) - 1)] == hashes
+
+    @classmethod
+    def from_files(cls, paths):
+        return cls(domain for path in paths for domain in read_feed(path))
+
+
+class ReputationIndex:
+    """Immutable block/allow snapshot; replaced as a whole on reload"""
+
+    def __init__(self, blocked=None, allowed=None, loaded_at=None):
+        self.blocked = blocked if blocked is not None else DomainSet()
+        self.allowed = allowed if allowed is not None else DomainSet()
+        self.loaded_at = loaded_at
+
+    def lookup(self, candidates):
+        """
+        Check candidates from most to least specific. The most specific listed
+        name wins, and the blocklist wins over the allowlist at the same level.
+        """
+        hashes = np.array([domain_hash(candidate) for candidate in candidates], dtype=np.uint64)
+        blocked = self.blocked.contains_hashes(hashes)
+        allowed = self.allowed.contains_hashes(hashes)
+        for candidate, is_blocked, is_allowed in zip(candidates, blocked, allowed):
+            if is_blocked:
+                return {'list': 'block', 'match': candidate}
+            if is_allowed:
+                return {'list': 'allow', 'match': candidate}
+        return None
+
+
+def candidate_domains(domain):
+    """The domain and each parent down to its registrable domain: a.b.evil.tk, b.evil.tk, evil.tk"""
+    labels, suffix_length = get_lexical_analyzer().split(domain)
+    stop = max(len(labels) - suffix_length - 1, 0)
+    return ['.'.join(labels[i:]) for i in range(stop + 1)]
+
+
+class ReputationStore:
+    """
+    Local block/allow lists. The first lookup loads the feeds before it
+    answers, so no scan is saved without its verdict while the process starts.
+    After that lookups read the current index reference and never wait; when
+    a feed file changes a background thread builds a new index and swaps it
+    in with a single assignment.
+    """
+
+    def __init__(self, blocklist_files=(), allowlist_files=(), check_interval=30):
+        self.blocklist_files = list(blocklist_files)
+        self.allowlist_files = list(allowlist_files)
+        self.check_interval = check_interval
+        self._index = ReputationIndex()
+        self._versions = None
+        self._next_check = 0.0
+        self._reloading = threading.Lock()
+        self.last_error = None
+
+    def lookup(self, domain):
+        """Return {'list': 'block'|'allow', 'match': ...} or None when the domain is not listed"""
+        self.maybe_reload()
+        return self._index.lookup(candidate_domains(domain))
+
+    def feed_versions(self):
+        versions = []
+        for path in self.blocklist_files + self.allowlist_files:
+            try:
+                stat = os.stat(path)
+                versions.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                versions.append((path, None, None))
+        return tuple(versions)
+
+    def maybe_reload(self):
+        """
+        Load the feeds on first use, then start a background reload if a feed
+        changed (checked every check_interval seconds)
+        """
+        if not self.blocklist_files and not self.allowlist_files:
+            return
+        if self._versions is None and self.last_error is None:
+            self.reload(wait=True)  # After a failed first load, retry in the background
+            return
+        now = time.monotonic()
+        if now < self._next_check or self._reloading.locked():
+            return
+        self._next_check = now + self.check_interval
+        versions = self.feed_versions()
+        if versions != self._versions:
+            threading.Thread(target=self.reload, args=(versions,), daemon=True).start()
+
+    def reload(self, versions=None, wait=False):
+        """
+        Build a new index from the feed files and swap it in; returns False if
+        skipped. With wait=True a running first load is waited for instead.
+        """
+        if not self._reloading.acquire(blocking=wait):
+            return False  # Another reload is already running
+        try:
+            if wait and (self._versions is not None or self.last_error is not None):
+                return False  # Loaded by the thread we waited for
+            versions = versions or self.feed_versions()
+            existing = lambda paths: [path for path in paths if os.path.exists(path)]
+            index = ReputationIndex(
+                DomainSet.from_files(existing(self.blocklist_files)),
+                DomainSet.from_files(existing(self.allowlist_files)),
+                loaded_at=time.time(),
+            )
+            self._index = index  # Readers see the old or the new index, never a mix
+            self._versions = versions
+            self._next_check = time.monotonic() + self.check_interval
+            self.last_error = None
+            return True
+        except (OSError, UnicodeError) as e:
+            self.last_error = str(e)  # Keep serving the previous index
+            return False
+        finally:
+            self._reloading.release()
+
+    def stats(self):
+        index = self._index
+        return {
+            'blocked': len(index.blocked),
+            'allowed': len(index.allowed),
+            'loadedAt': index.loaded_at,
+            'reloading': self._reloading.locked(),
+            'lastError': self.last_error,
+        }
+
+
+_store = None
+
+
+def get_reputation_store():
+    """Return the process-wide reputation store configured from settings"""
+    global _store
+    if _store is None:
+        from django.conf import settings
+        _store = ReputationStore(
+            settings.SCAN_BLOCKLIST_FILES,
+            settings.SCAN_ALLOWLIST_FILES,
+            settings.SCAN_REPUTATION_CHECK_SECONDS,
+        )
+    return _store
+
+
+def lookup_reputation(domain):
+    return get_reputation_store().lookup(domain)
@@ -0,0 +1,105 @@
+from asgiref.sync import sync_to_async
+
+from backend.lru_cache import LRUCache
+
+# Probe kinds that can be cached, each with its own TTL setting
+CACHE_KINDS = ('ssl', 'whois')
+
+
+def normalize_domain(domain):
+    """Normalize a domain for use as a cache key"""
+    domain = domain.strip().lower().rstrip('.')
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
+
+
+class DjangoCache:
+    """Adapter that stores entries in one of Django's configured caches"""
+
+    def __init__(self, alias):
+        from django.core.cache import caches
+        self._cache = caches[alias]
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, value, timeout=ttl)
+
+    def __len__(self):
+        return 0  # Size is not tracked by Django cache backends
+
+
+class ProbeCache:
+    """
+    Cache of SSL and WHOIS probe results keyed by normalized domain.
+
+    Results are returned with 'cached': True so the response can report it.
+    Partial (unknown) results are never cached; failed probes are cached with
+    the short 'error' TTL so a dead host is not retried on every request.
+    """
+
+    def __init__(self, backend, ttls):
+        self.backend = backend
+        self.ttls = ttls
+        self.hits = dict.fromkeys(CACHE_KINDS, 0)
+        self.misses = dict.fromkeys(CACHE_KINDS, 0)
+
+    def _key(self, kind, domain):
+        return f'scan:{kind}:{normalize_domain(domain)}'
+
+    def get(self, kind, domain):
+        result = self.backend.get(self._key(kind, domain))
+        if result is None:
+            self.misses[kind] += 1
+            return None
+        self.hits[kind] += 1
+        return dict(result, cached=True)
+
+    def set(self, kind, domain, result):
+        if result.get('unknown'):
+            return
+        ttl = self.ttls['error'] if 'error' in result else self.ttls[kind]
+        self.backend.set(self._key(kind, domain), result, ttl)
+
+    async def aget(self, kind, domain):
+        if isinstance(self.backend, LRUCache):
+            return self.get(kind, domain)
+        return await sync_to_async(self.get)(kind, domain)
+
+    async def aset(self, kind, domain, result):
+        if isinstance(self.backend, LRUCache):
+            return self.set(kind, domain, result)
+        return await sync_to_async(self.set)(kind, domain, result)
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+        }
+
+
+_probe_cache = None
+
+
+def probe_cache_is_shared():
+    """True when the probe cache is a Django cache every worker process sees"""
+    from django.conf import settings
+    from backend.shared_cache import is_local
+    return settings.SCAN_CACHE_BACKEND != 'memory' and not is_local(settings.SCAN_CACHE_BACKEND)
+
+
+def get_probe_cache():
+    """Return the process-wide probe cache configured from settings"""
+    global _probe_cache
+    if _probe_cache is None:
+        from django.conf import settings
+        if settings.SCAN_CACHE_BACKEND == 'memory':
+            backend = LRUCache(settings.SCAN_CACHE_MAX_ENTRIES)
+        else:
+            backend = DjangoCache(settings.SCAN_CACHE_BACKEND)
+        _probe_cache = ProbeCache(backend, settings.SCAN_CACHE_TTLS)
+    return _probe_cache
@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from ..models import CommunityReport, ScanResult, ScanResultArchive, SecurityReport
+from .keyset import row_compare
+
+ARCHIVE_FIELDS = ['url', 'domain', 'risk_level', 'risk_category', 'ssl_grade', 'domain_age', 'created_at']
+
+
+def retention_cutoffs(now=None):
+    """{risk_category: created_at cutoff} from SCAN_RETENTION_DAYS, skipping categories kept forever"""
+    now = now or timezone.now()
+    return {
+        category: now - timedelta(days=days)
+        for category, days in settings.SCAN_RETENTION_DAYS.items()
+        if days
+    }
+
+
+def prunable_scans(category, cutoff):
+    """
+    Scans of a category older than cutoff that have a newer scan of the same
+    domain (probed on the (domain, -created_at) index), so the latest verdict
+    of every domain stays. Scans with community or security reports are kept,
+    since deleting the scan would cascade to them.
+    """
+    newer = ScanResult.objects.filter(domain=OuterRef('domain')).filter(
+        Q(created_at__gt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), id__gt=OuterRef('id'))
+    )
+    return ScanResult.objects.filter(risk_category=category, created_at__lt=cutoff).filter(
+        Exists(newer),
+        ~Exists(CommunityReport.objects.filter(scan_result=OuterRef('id'))),
+        ~Exists(SecurityReport.objects.filter(scan_result=OuterRef('id'))),
+    ).order_by()
+
+
+def prune_batch(ids, archive=True):
+    """
+    Move one batch of scans to the archive and delete them in a short
+    transaction. ScanJobs pointing at them keep their status with an empty
+    result. Returns rows deleted.
+    """
+    with transaction.atomic():
+        if archive:
+            ScanResultArchive.objects.bulk_create([
+                ScanResultArchive(scan_id=row.pop('id'), **row)
+                for row in ScanResult.objects.filter(id__in=ids).values('id', *ARCHIVE_FIELDS)
+            ], ignore_conflicts=True)  # Rows archived by an interrupted earlier run
+        deleted = ScanResult.objects.filter(id__in=ids).delete()[1]
+    return deleted.get(ScanResult._meta.label, 0)
+
+
+def prune_scans(batch_size=None, archive=None, pause=0, dry_run=False, log=None):
+    """
+    Apply SCAN_RETENTION_DAYS to ScanResult in batches of batch_size rows, one
+    transaction each, sleeping `pause` seconds between batches so replication
+    and autovacuum keep up. The daily rollups are not touched.
+    Returns {risk_category: rows pruned (or prunable, with dry_run)}.
+    """
+    batch_size = batch_size or settings.SCAN_RETENTION_BATCH_SIZE
+    archive = settings.SCAN_RETENTION_ARCHIVE if archive is None else archive
+    pruned = {}
+    for category, cutoff in retention_cutoffs().items():
+        scans = prunable_scans(category, cutoff)
+        if dry_run:
+            pruned[category] = scans.count()
+            continue
+        pruned[category] = 0
+        # Keyset on (created_at, id): each batch starts after the last row of
+        # the previous one, so kept rows are examined once, not on every pass
+        batch = scans
+        while True:
+            rows = list(batch.order_by('created_at', 'id').values_list('created_at', 'id')[:batch_size])
+            if not rows:
+                break
+            pruned[category] += prune_batch([scan_id for _, scan_id in rows], archive)
+            if log:
+                log(f'{category}: pruned {pruned[category]} scans older than {cutoff:%Y-%m-%d}')
+            if len(rows) < batch_size:
+                break
+            batch = scans.filter(row_compare(ScanResult, ('created_at', 'id'), '>', rows[-1]))
+            time.sleep(pause)
+    return pruned
+
+
+def vacuum_scans():
+    """VACUUM ANALYZE the hot table so freed pages are reused (PostgreSQL only)"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f'VACUUM (ANALYZE) {ScanResult._meta.db_table}')
+    return True
@@ -1,43 +1,39 @@
+from .risk_engine import get_weights
+
 def calculate_risk(ssl_data, domain_data):
     """
     Calculate risk score on a scale of 1-100
     Lower score = lower risk, Higher score = higher risk
+    Points come from the weight table in risk_engine.WEIGHTS
     """
+    weights = get_weights()
     risk_score = 0  # Start with 0, we'll add points for risks
     
-    # SSL factors (50% weight - 50 points max)
+    # Probes that missed the scan deadline come back as unknown partial results
+    ssl_unknown = ssl_data.get('unknown', False)
+    
+    # SSL factors - N/A or other grades score as unknown
     ssl_grade = ssl_data.get('grade', 'N/A')
-    if ssl_grade == 'A':
-        risk_score += 0  # Excellent - no risk points
-    elif ssl_grade == 'B':
-        risk_score += 15  # Good - low risk
-    elif ssl_grade == 'C':
-        risk_score += 30  # Fair - medium risk
-    elif ssl_grade == 'F':
-        risk_score += 50  # Poor - high risk
-    else:  # N/A or other
-        risk_score += 50  # Unknown - assume high risk
+    risk_score += weights['grade_points'].get(ssl_grade, weights['grade_default'])
     
-    # Domain age factors (30% weight - 30 points max)
+    # Domain age factors - first band the age is older than
     domain_age = domain_data.get('age', 0)
-    if domain_age > 5:
-        risk_score += 0  # Established domain - no risk
-    elif domain_age > 2:
-        risk_score += 10  # Moderately new - low risk
-    elif domain_age > 0:
-        risk_score += 20  # New domain - medium risk
+    for older_than, points in weights['age_bands']:
+        if domain_age > older_than:
+            risk_score += points
+            break
     else:
-        risk_score += 30  # Unknown age - high risk
-    
-    # Additional factors (20% weight - 20 points max)
-    # Add points for other potential risks
-    if ssl_data.get('protocol') in ['TLSv1', 'TLSv1.1']:
-        risk_score += 10  # Outdated protocol
+        risk_score += weights['age_default']  # Unknown age - high risk
     
-    if ssl_data.get('days_until_expiry', 0) < 15:
-        risk_score += 10  # Expiring very soon
+    # Add points for other potential risks (skipped when the SSL check is unknown)
+    if not ssl_unknown:
+        # Outdated protocol
+        risk_score += weights['protocol_points'].get(ssl_data.get('protocol'), 0)
+        
+        if ssl_data.get('days_until_expiry', 0) < weights['expiry_soon_days']:
+            risk_score += weights['expiry_soon_points']  # Expiring very soon
     
     # Ensure score is between 1-100
-    risk_score = max(1, min(100, risk_score))
+    risk_score = max(weights['min_score'], min(weights['max_score'], risk_score))
     
-    return risk_score
\ No newline at end of file
+    return risk_score
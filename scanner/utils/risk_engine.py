@@ -0,0 +1,83 @@
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Declarative weight table shared by calculate_risk (one scan) and
+# score_batch (columnar rescoring). Change weights here, then run
+# `python manage.py rescore_scans` to apply them to stored history.
+WEIGHTS = {
+    # SSL factors (50% weight - 50 points max)
+    'grade_points': {'A': 0, 'B': 15, 'C': 30, 'F': 50},
+    'grade_default': 50,  # N/A or other - unknown, assume high risk
+
+    # Domain age factors (30% weight - 30 points max): (older than N years, points)
+    'age_bands': [(5, 0), (2, 10), (0, 20)],
+    'age_default': 30,  # Unknown age - high risk
+
+    # Additional factors (20% weight - 20 points max), skipped when SSL is unknown
+    'protocol_points': {'TLSv1': 10, 'TLSv1.1': 10},  # Outdated protocol
+    'expiry_soon_days': 15,
+    'expiry_soon_points': 10,  # Expiring very soon
+
+    'min_score': 1,
+    'max_score': 100,
+}
+
+# Risk category lower bounds, highest first (see models.get_risk_category)
+CATEGORY_BANDS = [(80, 'critical'), (60, 'high'), (30, 'medium')]
+
+
+def get_weights():
+    """Weight table with any SCAN_RISK_WEIGHTS overrides from settings applied"""
+    try:
+        overrides = getattr(settings, 'SCAN_RISK_WEIGHTS', {})
+    except ImproperlyConfigured:  # Used outside Django, e.g. from benchmarks
+        overrides = {}
+    return {**WEIGHTS, **overrides}
+
+
+def _lookup(values, table, default):
+    """Map an array of labels through a dict with one vectorized compare per table entry"""
+    values = np.asarray(values, dtype=str)  # None becomes 'None', which matches no entry
+    points = np.full(values.shape, default, dtype=np.int64)
+    for label, label_points in table.items():
+        points[values == label] = label_points
+    return points
+
+
+def score_batch(grades, ages, protocols, expiry_days, ssl_unknown=None, weights=None):
+    """
+    Score many scans at once. All arguments are equal-length sequences:
+    SSL grade labels, domain ages in years, TLS protocol names (None when
+    unknown), days until certificate expiry (NaN when unknown) and an
+    optional flag for SSL probes that missed the deadline.
+    Returns an int array of risk scores.
+    """
+    weights = weights or get_weights()
+    ages = np.asarray(ages, dtype=np.float64)
+    expiry_days = np.asarray(expiry_days, dtype=np.float64)
+    if ssl_unknown is None:
+        ssl_unknown = np.zeros(len(ages), dtype=bool)
+    ssl_known = ~np.asarray(ssl_unknown, dtype=bool)
+
+    score = _lookup(grades, weights['grade_points'], weights['grade_default'])
+
+    conditions = [ages > threshold for threshold, _ in weights['age_bands']]
+    choices = [points for _, points in weights['age_bands']]
+    score += np.select(conditions, choices, default=weights['age_default'])
+
+    protocol_points = _lookup(protocols, weights['protocol_points'], 0)
+    expiring = expiry_days < weights['expiry_soon_days']  # NaN compares False
+    score += np.where(ssl_known, protocol_points + expiring * weights['expiry_soon_points'], 0)
+
+    return np.clip(score, weights['min_score'], weights['max_score'])
+
+
+def categorize_batch(scores):
+    """Vectorized models.get_risk_category"""
+    scores = np.asarray(scores)
+    return np.select(
+        [scores >= bound for bound, _ in CATEGORY_BANDS],
+        [category for _, category in CATEGORY_BANDS],
+        default='low',
+    )
@@ -0,0 +1,169 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+from ..models import DailyDomainRisk, DailyRiskRollup, ScanResult, ScanResultArchive
+
+
+def _upsert(model, lookup, updates, defaults):
+    """Apply F() updates to the row matching lookup, creating it when missing"""
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults)
+    except IntegrityError:  # Created by a concurrent writer - update that row instead
+        model.objects.filter(**lookup).update(**updates)
+
+
+def record_scans(scan_results):
+    """
+    Add saved scans to the daily rollups: one increment per distinct
+    (day, category, grade) and (day, domain) group in the batch.
+    """
+    counts = Counter()
+    domains = {}
+    for scan in scan_results:
+        day = timezone.localdate(scan.created_at)
+        counts[(day, scan.risk_category, scan.ssl_grade)] += 1
+        max_risk, scans = domains.get((day, scan.domain), (scan.risk_level, 0))
+        domains[(day, scan.domain)] = (max(max_risk, scan.risk_level), scans + 1)
+
+    # Sorted so concurrent writers lock rows in the same order
+    with transaction.atomic():
+        for (day, category, grade), count in sorted(counts.items()):
+            _upsert(
+                DailyRiskRollup,
+                {'day': day, 'risk_category': category, 'ssl_grade': grade},
+                {'count': F('count') + count},
+                {'count': count},
+            )
+        for (day, domain), (max_risk, scans) in sorted(domains.items()):
+            _upsert(
+                DailyDomainRisk,
+                {'day': day, 'domain': domain},
+                {'max_risk': Greatest(F('max_risk'), Value(max_risk)), 'scans': F('scans') + scans},
+                {'max_risk': max_risk, 'scans': scans},
+            )
+
+
+def day_bounds(since=None, until=None):
+    """created_at filter for the local days since..until (inclusive)"""
+    bounds = {}
+    if since:
+        bounds['created_at__gte'] = timezone.make_aware(datetime.combine(since, time.min))
+    if until:
+        bounds['created_at__lt'] = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min))
+    return bounds
+
+
+def rebuild_rollups(since=None, until=None, batch_size=2000):
+    """
+    Recompute the rollups of the given day range (all days by default) with
+    GROUP BY queries over ScanResult and ScanResultArchive, so days thinned
+    out by prune_scans keep their counts. Returns (category rows, domain rows).
+    """
+    bounds = day_bounds(since, until)
+    sources = [
+        model.objects.filter(**bounds).annotate(day=TruncDate('created_at')).order_by()
+        for model in (ScanResult, ScanResultArchive)
+    ]
+    days = {}
+    if since:
+        days['day__gte'] = since
+    if until:
+        days['day__lte'] = until
+
+    with transaction.atomic():
+        DailyRiskRollup.objects.filter(**days).delete()
+        DailyDomainRisk.objects.filter(**days).delete()
+
+        counts = Counter()
+        for scans in sources:
+            for row in scans.values('day', 'risk_category', 'ssl_grade').annotate(count=Count('id')):
+                counts[(row['day'], row['risk_category'], row['ssl_grade'])] += row['count']
+        # record_scans of live scans may recreate deleted rows before this
+        # commits, so rebuilt rows overwrite them instead of failing
+        categories = DailyRiskRollup.objects.bulk_create([
+            DailyRiskRollup(day=day, risk_category=category, ssl_grade=grade, count=count)
+            for (day, category, grade), count in counts.items()
+        ], batch_size=batch_size, update_conflicts=True,
+            unique_fields=['day', 'risk_category', 'ssl_grade'], update_fields=['count'])
+
+        # One row per domain and day can be large - merge the two tables a day at a time
+        domain_rows = 0
+        for day in sorted({day for day, _, _ in counts}):
+            domains = {}
+            for scans in sources:
+                rows = scans.filter(**day_bounds(day, day)).values('domain').annotate(
+                    max_risk=Max('risk_level'), scans=Count('id')
+                )
+                for row in rows.iterator(chunk_size=batch_size):
+                    max_risk, scans_count = domains.get(row['domain'], (row['max_risk'], 0))
+                    domains[row['domain']] = (max(max_risk, row['max_risk']), scans_count + row['scans'])
+            DailyDomainRisk.objects.bulk_create([
+                DailyDomainRisk(day=day, domain=domain, max_risk=max_risk, scans=scans_count)
+                for domain, (max_risk, scans_count) in domains.items()
+            ], batch_size=batch_size, update_conflicts=True,
+                unique_fields=['day', 'domain'], update_fields=['max_risk', 'scans'])
+            domain_rows += len(domains)
+
+    return len(categories), domain_rows
+
+
+def top_risky_domains(days, top):
+    """
+    (day, domain, max_risk, scans) of the `top` riskiest domains of each day.
+    Each day is its own LIMIT query on the (day, -max_risk, -scans) index, so
+    the cost does not grow with the number of domains per day. PostgreSQL runs
+    them as one UNION ALL. SQLite cannot limit the parts of a compound query,
+    so there a correlated LIMIT subquery picks the rows instead.
+    """
+    if not days:
+        return []
+    per_day = DailyDomainRisk.objects.order_by('-max_risk', '-scans')
+    fields = ('day', 'domain', 'max_risk', 'scans')
+    if connection.features.supports_slicing_ordering_in_compound:
+        queries = [per_day.filter(day=day).values_list(*fields)[:top] for day in days]
+        rows = queries[0].union(*queries[1:], all=True)
+    else:
+        rows = DailyDomainRisk.objects.filter(day__in=days, pk__in=Subquery(
+            per_day.filter(day=OuterRef('day')).values('pk')[:top]
+        )).values_list(*fields)
+    return sorted(rows, key=lambda row: (row[0], -row[2], -row[3]))
+
+
+def get_risk_stats(days=30, top=10):
+    """Dashboard statistics for the last `days` days, read only from the rollup tables"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    per_day = {}
+    totals = {'total': 0, 'riskCategories': Counter(), 'sslGrades': Counter()}
+
+    rollups = DailyRiskRollup.objects.filter(day__gte=since).values_list(
+        'day', 'risk_category', 'ssl_grade', 'count'
+    )
+    for day, category, grade, count in rollups:
+        entry = per_day.setdefault(day, {
+            'day': day.isoformat(),
+            'total': 0,
+            'riskCategories': Counter(),
+            'sslGrades': Counter(),
+        })
+        for summary in (entry, totals):
+            summary['total'] += count
+            summary['riskCategories'][category] += count
+            summary['sslGrades'][grade] += count
+
+    # Only days with scans have domain rows
+    for entry in per_day.values():
+        entry['topRiskyDomains'] = []
+    for day, domain, max_risk, scans in top_risky_domains(sorted(per_day), top):
+        per_day[day]['topRiskyDomains'].append({'domain': domain, 'maxRisk': max_risk, 'scans': scans})
+
+    return {
+        'since': since.isoformat(),
+        'totals': totals,
+        'days': [per_day[day] for day in sorted(per_day, reverse=True)],
+    }
@@ -0,0 +1,202 @@
+import asyncio
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from ..models import ScanResult, get_risk_category
+from .ssl_checker import check_ssl, check_ssl_async
+from .domain_checker import get_domain_age, get_domain_age_async
+from .risk_calculator import calculate_risk
+from .probe_runner import run_probes, run_probes_async
+from .result_cache import get_probe_cache, normalize_domain, probe_cache_is_shared
+from .single_flight import domain_lock, get_single_flight, lock_stats
+from .lexical import analyze_domain
+from .reputation import VERDICT_RISK_LEVELS, lookup_reputation
+from .timing import ScanTimer
+
+# Timer stage of each probe - a probe that misses the deadline is timed as the deadline
+PROBE_STAGES = {'ssl': 'tls', 'whois': 'whois'}
+
+# SSL probe fields stored in report_card['ssl'] for rescoring
+RESCORE_SSL_KEYS = ('protocol', 'days_until_expiry', 'unknown')
+
+def recent_scans(domain):
+    """Scans of this domain inside the freshness window, newest first"""
+    since = timezone.now() - timedelta(minutes=settings.SCAN_FRESHNESS_MINUTES)
+    return ScanResult.objects.filter(domain=domain, created_at__gte=since).order_by('-created_at')
+
+def is_reusable(scan_result):
+    """Partial scans (a probe missed the deadline) are never served as a verdict"""
+    return scan_result is not None and not scan_result.report_card.get('partial')
+
+def build_scan_fields(url, domain, ssl_data, domain_data, lexical=None, reputation=None):
+    """
+    Score the probe results and return the ScanResult field values.
+    A reputation list hit sets the risk level directly (no probe data needed).
+    """
+    if lexical is None:
+        lexical = analyze_domain(domain)
+    if reputation:
+        risk_level = VERDICT_RISK_LEVELS[reputation['list']]
+    else:
+        risk_level = calculate_risk(ssl_data, domain_data)
+    partial = ssl_data.get('unknown', False) or domain_data.get('unknown', False)
+
+    return {
+        'url': url,
+        'domain': domain,
+        'risk_level': risk_level,
+        'risk_category': get_risk_category(risk_level),
+        'ssl_grade': ssl_data.get('grade', 'N/A'),
+        'domain_age': domain_data.get('age', 0),
+        'domain_created': domain_data.get('created'),
+        # Add other fields if available from your checks
+        'ssl_valid': ssl_data.get('valid', False),
+        'security_score': 100 - risk_level,  # Inverse of risk level
+        'trust_score': max(0, 100 - risk_level),  # Higher risk = lower trust
+        'report_card': build_report_card(ssl_data, partial, lexical, reputation)
+    }
+
+def build_report_card(ssl_data, partial, lexical, reputation=None):
+    """Keep the SSL inputs that ScanResult has no column for, so rescore_scans can replay them"""
+    report_card = {
+        'ssl': {key: ssl_data[key] for key in RESCORE_SSL_KEYS if key in ssl_data},
+        'lexical': {key: lexical[key] for key in ('signals', 'keywords', 'score')},
+    }
+    if reputation:
+        report_card['reputation'] = reputation  # rescore_scans keeps these verdicts
+    if partial:
+        report_card['partial'] = True
+    return report_card
+
+def probe_domain(domain, refresh=False, timer=None):
+    """
+    Return (ssl_data, domain_data) for a domain, serving each from the probe
+    cache when possible and probing the rest in parallel under the scan deadline.
+    With refresh=True the cache is skipped but still updated.
+
+    Concurrent requests for the same domain share one in-flight probe; only
+    the request that actually probes records 'tls'/'whois' stages in `timer`.
+    Refresh requests only share with each other, never with a probe that may
+    serve cached results.
+    """
+    timer = timer or ScanTimer()
+    return get_single_flight().do(
+        flight_key(domain, refresh), lambda: _probe_domain(domain, refresh, timer)
+    )
+
+def flight_key(domain, refresh):
+    return (normalize_domain(domain), refresh)
+
+def _probe_domain(domain, refresh, timer):
+    cache = get_probe_cache()
+    ssl_data = None if refresh else cache.get('ssl', domain)
+    domain_data = None if refresh else cache.get('whois', domain)
+    if ssl_data is not None and domain_data is not None:
+        return ssl_data, domain_data
+
+    # Across worker processes only the lock holder probes; the others wait and
+    # then pick its results up from the probe cache - pointless unless it is shared
+    with domain_lock(normalize_domain(domain), settings.SCAN_DEADLINE_SECONDS,
+                     enabled=settings.SCAN_SINGLE_FLIGHT_DB_LOCK and probe_cache_is_shared()) as waited:
+        if waited:
+            if ssl_data is None:
+                ssl_data = cache.get('ssl', domain)
+            if domain_data is None:
+                domain_data = cache.get('whois', domain)
+            if ssl_data is not None and domain_data is not None:
+                lock_stats['reused'] += 1
+
+        probes = {}
+        if ssl_data is None:
+            probes['ssl'] = timer.timed('tls', check_ssl, domain)
+        if domain_data is None:
+            probes['whois'] = timer.timed('whois', get_domain_age, domain)
+
+        if probes:
+            probe_results = run_probes(probes, settings.SCAN_DEADLINE_SECONDS)
+            timer.expire([PROBE_STAGES[kind] for kind in probes], settings.SCAN_DEADLINE_SECONDS)
+            for kind, result in probe_results.items():
+                cache.set(kind, domain, result)
+            ssl_data = probe_results.get('ssl', ssl_data)
+            domain_data = probe_results.get('whois', domain_data)
+
+    return ssl_data, domain_data
+
+async def probe_domain_async(domain, refresh=False, timer=None):
+    """Async counterpart of probe_domain (coalesced within this process only)"""
+    timer = timer or ScanTimer()
+    return await get_single_flight().ado(
+        flight_key(domain, refresh), lambda: _probe_domain_async(domain, refresh, timer)
+    )
+
+async def _probe_domain_async(domain, refresh, timer):
+    cache = get_probe_cache()
+    ssl_data = None if refresh else await cache.aget('ssl', domain)
+    domain_data = None if refresh else await cache.aget('whois', domain)
+
+    probes = {}
+    if ssl_data is None:
+        probes['ssl'] = timer.atimed('tls', check_ssl_async(domain))
+    if domain_data is None:
+        probes['whois'] = timer.atimed('whois', get_domain_age_async(domain))
+
+    if probes:
+        probe_results = await run_probes_async(probes, settings.SCAN_DEADLINE_SECONDS)
+        timer.expire([PROBE_STAGES[kind] for kind in probes], settings.SCAN_DEADLINE_SECONDS)
+        for kind, result in probe_results.items():
+            await cache.aset(kind, domain, result)
+        ssl_data = probe_results.get('ssl', ssl_data)
+        domain_data = probe_results.get('whois', domain_data)
+
+    return ssl_data, domain_data
+
+async def probe_domains_async(domains, concurrency):
+    """Probe each domain once with at most `concurrency` domains in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(domain):
+        async with semaphore:
+            return await probe_domain_async(domain)
+
+    results = await asyncio.gather(*(probe(domain) for domain in domains))
+    return dict(zip(domains, results))
+
+def run_scan(url, domain, refresh=False, timer=None, reputation=None):
+    """
+    Probe, score and save one scan - returns (scan_result, ssl_data, domain_data).
+    Domains on a local block/allow list are saved without any network probe.
+    Stage timings up to the insert are stored in report_card['timings'].
+    """
+    timer = timer or ScanTimer()
+    with timer.stage('lexical'):  # No I/O, runs before any network probe
+        lexical = analyze_domain(domain)
+    with timer.stage('reputation'):
+        reputation = reputation or lookup_reputation(domain)
+    ssl_data, domain_data = {}, {}
+    if reputation is None:
+        with timer.stage('probe'):
+            ssl_data, domain_data = probe_domain(domain, refresh=refresh, timer=timer)
+    with timer.stage('risk'):
+        fields = build_scan_fields(url, domain, ssl_data, domain_data, lexical, reputation)
+    fields['report_card']['timings'] = timer.as_ms()
+    with timer.stage('db'):
+        scan_result = ScanResult.objects.create(**fields)
+    return scan_result, ssl_data, domain_data
+
+async def run_scan_async(url, domain, refresh=False, timer=None, reputation=None):
+    """Async counterpart of run_scan"""
+    timer = timer or ScanTimer()
+    with timer.stage('lexical'):
+        lexical = analyze_domain(domain)
+    with timer.stage('reputation'):
+        reputation = reputation or lookup_reputation(domain)
+    ssl_data, domain_data = {}, {}
+    if reputation is None:
+        with timer.stage('probe'):
+            ssl_data, domain_data = await probe_domain_async(domain, refresh=refresh, timer=timer)
+    with timer.stage('risk'):
+        fields = build_scan_fields(url, domain, ssl_data, domain_data, lexical, reputation)
+    fields['report_card']['timings'] = timer.as_ms()
+    with timer.stage('db'):
+        scan_result = await ScanResult.objects.acreate(**fields)
+    return scan_result, ssl_data, domain_data
@@ -0,0 +1,138 @@
+import re
+from django.db import connection
+from django.db.models import BooleanField, Count, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from ..models import CommunityStory, ScanResult, StoryToken
+from .story_feed import FEED_STATUSES
+from .url_parser import extract_domain_from_url, registrable_domain
+
+# Must match the expression of story_fts_idx (migration 0011) for the GIN index to be used
+STORY_DOCUMENT_SQL = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(story, ''))"
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+HOST_RE = re.compile(r'(?:https?://)?((?:[a-z0-9-]+\.)+[a-z]{2,})', re.IGNORECASE)
+PHONE_RE = re.compile(r'\+?\d[\d\s().-]{5,}\d')
+
+# Shortest scan search term - pg_trgm cannot serve shorter LIKE patterns from
+# the trigram indexes, so they would scan the whole table
+MIN_SCAN_TERM = 3
+
+STOP_WORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'i', 'in', 'is', 'it',
+              'me', 'my', 'of', 'on', 'or', 'so', 'that', 'the', 'this', 'to', 'was', 'we', 'with'}
+
+
+def use_full_text():
+    return connection.vendor == 'postgresql'
+
+
+def phone_key(text):
+    """Digits of a phone number, last 10 only so country codes do not matter"""
+    digits = re.sub(r'\D', '', text)
+    return digits[-10:] if len(digits) >= 7 else None
+
+
+def words(text):
+    return [word for word in WORD_RE.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def mention_tokens(story):
+    """'phone:<digits>' and 'domain:<registrable domain>' keys for numbers and sites a story mentions"""
+    tokens = set()
+    text = f'{story.title} {story.story}'
+    for match in PHONE_RE.findall(text) + [story.phone_number or '']:
+        key = phone_key(match)
+        if key:
+            tokens.add(f'phone:{key}')
+    hosts = HOST_RE.findall(text)
+    if story.website_url:
+        hosts.append(extract_domain_from_url(story.website_url))
+    for host in hosts:
+        tokens.add(f'domain:{registrable_domain(host)}')
+    return tokens
+
+
+def index_story(story):
+    """
+    Rebuild the StoryToken rows of one story. Phone/domain mentions are
+    indexed on every database; plain words only where there is no
+    PostgreSQL full-text index (SQLite in tests).
+    """
+    tokens = mention_tokens(story)
+    if not use_full_text():
+        tokens.update(f'word:{word}' for word in words(f'{story.title} {story.story}'))
+    StoryToken.objects.filter(story=story).delete()
+    StoryToken.objects.bulk_create([StoryToken(story=story, token=token) for token in sorted(tokens)])
+
+
+def query_mentions(query):
+    """Mention tokens for a query that is a phone number or a URL/domain"""
+    key = phone_key(query)
+    if key and not re.search(r'[a-z]', query, re.IGNORECASE):
+        return [f'phone:{key}']
+    if ' ' not in query.strip() and '.' in query:
+        try:
+            return [f'domain:{registrable_domain(extract_domain_from_url(query.strip()))}']
+        except ValueError:
+            return []
+    return []
+
+
+def search_stories(query, limit=20):
+    """Public stories matching the query, best first, as (story, rank) pairs"""
+    stories = CommunityStory.objects.filter(status__in=FEED_STATUSES, is_public=True)
+    results = []
+
+    # Phone numbers and URLs: exact lookup of indexed mentions
+    mentions = query_mentions(query)
+    if mentions:
+        matched = stories.filter(tokens__token__in=mentions).distinct().order_by('-created_at')[:limit]
+        results = [(story, 1.0) for story in matched]
+
+    if len(results) < limit:
+        seen = {story.id for story, _ in results}
+        if use_full_text():
+            ranked = stories.filter(
+                RawSQL(f"{STORY_DOCUMENT_SQL} @@ websearch_to_tsquery('english', %s)", [query],
+                       output_field=BooleanField())
+            ).annotate(
+                rank=RawSQL(f"ts_rank({STORY_DOCUMENT_SQL}, websearch_to_tsquery('english', %s))", [query],
+                            output_field=FloatField())
+            ).exclude(id__in=seen).order_by('-rank', '-created_at')[:limit - len(results)]
+            results += [(story, round(story.rank, 4)) for story in ranked]
+        else:
+            terms = [f'word:{word}' for word in dict.fromkeys(words(query))]
+            if terms:
+                # Inverted index: rank by the share of query terms a story contains
+                ranked = stories.filter(tokens__token__in=terms).exclude(id__in=seen).annotate(
+                    hits=Count('tokens', distinct=True)
+                ).order_by('-hits', '-created_at')[:limit - len(results)]
+                results += [(story, round(story.hits / len(terms), 4)) for story in ranked]
+    return results
+
+
+def filter_scans(scans, term):
+    """
+    Scans whose lowercased URL or domain contains term (already lowercase).
+    On PostgreSQL these LIKE filters use the trigram GIN indexes.
+    """
+    return scans.annotate(url_lower=Lower('url'), domain_lower=Lower('domain')).filter(
+        Q(domain_lower__contains=term) | Q(url_lower__contains=term)
+    )
+
+
+def search_scans(query, limit=20):
+    """Scans whose URL or domain contains the query, exact domain matches first"""
+    term = query.strip().lower()
+    if len(term) < MIN_SCAN_TERM:
+        return []
+    try:
+        domain = extract_domain_from_url(term) if '.' in term else None
+    except ValueError:
+        domain = None
+
+    scans = filter_scans(ScanResult.objects.all(), term)
+    exact = list(ScanResult.objects.filter(domain=domain).order_by('-created_at')[:limit]) if domain else []
+    seen = {scan.id for scan in exact}
+    partial = [scan for scan in scans.order_by('-created_at')[:limit + len(exact)] if scan.id not in seen]
+    return (exact + partial)[:limit]
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from django.db import OperationalError, connection
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: while a call for a key is running, other
+    callers for the same key wait on its shared future instead of repeating it.
+    Works for threads (do) and coroutines (ado) through the same registry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.started = 0
+        self.shared = 0
+
+    def _join(self, key):
+        """Return (future, is_leader) for a key"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.started += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def ado(self, key, coro_fn):
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await coro_fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stats(self):
+        return {'started': self.started, 'shared': self.shared}
+
+
+# Cross-process counters for the advisory lock below
+lock_stats = {'waits': 0, 'reused': 0, 'timeouts': 0}
+
+
+def _acquire_advisory_lock(cursor, key, timeout):
+    """Take the session-level lock for key; returns (waited, held)"""
+    cursor.execute('SELECT pg_try_advisory_lock(hashtext(%s))', [key])
+    if cursor.fetchone()[0]:
+        return False, True
+
+    lock_stats['waits'] += 1
+    cursor.execute("SELECT set_config('lock_timeout', %s, false)", [f'{int(timeout * 1000)}ms'])
+    try:
+        cursor.execute('SELECT pg_advisory_lock(hashtext(%s))', [key])
+    except OperationalError:
+        # Gave up waiting on the other worker - probe independently
+        lock_stats['timeouts'] += 1
+        return False, False
+    finally:
+        cursor.execute('RESET lock_timeout')
+    return True, True
+
+
+@contextmanager
+def domain_lock(key, timeout, enabled=True):
+    """
+    Cross-process single flight for gunicorn workers using a Postgres
+    session-level advisory lock, taken outside any transaction so no
+    transaction stays open across the probes. Yields True if another process
+    held the lock and we waited for it - the caller should then re-check the
+    shared cache before probing. A no-op on other databases and inside an
+    atomic block (a lock timeout there would abort the transaction).
+    """
+    if not enabled or connection.vendor != 'postgresql' or connection.in_atomic_block:
+        yield False
+        return
+
+    with connection.cursor() as cursor:
+        waited, held = _acquire_advisory_lock(cursor, key, timeout)
+    try:
+        yield waited
+    finally:
+        if held:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(hashtext(%s))', [key])
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight():
+    return _single_flight
@@ -1,35 +1,44 @@
-import ssl
-import socket
+import asyncio
 from datetime import datetime
+from .tls_engine import get_tls_engine
 
 def check_ssl(domain):
     try:
-        context = ssl.create_default_context()
-        with socket.create_connection((domain, 443), timeout=10) as sock:
-            with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                cert = ssock.getpeercert()
-                
-                # Get certificate expiration
-                expire_date = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                days_until_expiry = (expire_date - datetime.now()).days
-                
-                # Get protocol version
-                protocol = ssock.version()
-                
-                # Grade the SSL certificate
-                grade = calculate_ssl_grade(cert, protocol, days_until_expiry)
-                
-                return {
-                    'grade': grade,
-                    'valid': True,
-                    'valid_from': cert['notBefore'],
-                    'valid_to': cert['notAfter'],
-                    'issuer': get_issuer_name(cert),
-                    'days_until_expiry': days_until_expiry,
-                    'protocol': protocol
-                }
+        cert, protocol = get_tls_engine().handshake(domain)
+        return build_ssl_result(cert, protocol)
     except Exception as e:
-        return {'grade': 'N/A', 'error': str(e)}
+        return {'grade': 'N/A', 'error': str(e) or type(e).__name__}
+
+async def check_ssl_async(domain):
+    """Same as check_ssl, but performs the TLS handshake with asyncio streams"""
+    try:
+        engine = get_tls_engine()
+        cert, protocol = await asyncio.wait_for(
+            engine.ahandshake(domain),
+            timeout=engine.connect_timeout + engine.handshake_timeout
+        )
+        return build_ssl_result(cert, protocol)
+    except Exception as e:
+        return {'grade': 'N/A', 'error': str(e) or type(e).__name__}
+
+def build_ssl_result(cert, protocol):
+    """Build the SSL check result from a peer certificate and protocol version"""
+    # Get certificate expiration
+    expire_date = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+    days_until_expiry = (expire_date - datetime.now()).days
+    
+    # Grade the SSL certificate
+    grade = calculate_ssl_grade(cert, protocol, days_until_expiry)
+    
+    return {
+        'grade': grade,
+        'valid': True,
+        'valid_from': cert['notBefore'],
+        'valid_to': cert['notAfter'],
+        'issuer': get_issuer_name(cert),
+        'days_until_expiry': days_until_expiry,
+        'protocol': protocol
+    }
 
 def calculate_ssl_grade(cert, protocol, days_until_expiry):
     if days_until_expiry <= 0:
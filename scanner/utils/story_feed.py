@@ -0,0 +1,96 @@
+import base64
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from backend.shared_cache import shared_cache
+from ..models import CommunityStory
+from .keyset import row_compare
+
+# Stories shown in the public feed
+FEED_STATUSES = ('approved', 'featured')
+
+# Columns the listing needs (the excerpt is cut from story by get_short_story)
+FEED_FIELDS = ('id', 'title', 'story', 'scam_type', 'author_name', 'is_anonymous', 'created_at', 'user__username')
+
+
+def encode_cursor(story):
+    raw = f'{story.created_at.isoformat()}|{story.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from an opaque cursor, raising ValueError when invalid"""
+    try:
+        created_at, story_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError
+        return created_at, int(story_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+
+def first_page_key(scam_type):
+    return f'story_feed:first:{scam_type or "all"}'
+
+
+def serialize_story(story):
+    return {
+        'id': story.id,
+        'title': story.title,
+        'excerpt': story.get_short_story(),
+        'scamType': story.scam_type,
+        'scamTypeDisplay': story.get_scam_type_display(),
+        'author': story.get_display_name(),
+        'createdAt': story.created_at.isoformat(),
+    }
+
+
+def fetch_page(scam_type=None, cursor=None, limit=20):
+    """
+    One feed page, newest first. Keyset pagination on (created_at, id): the
+    cursor is the last row of the previous page, so every page is a single
+    index range scan no matter how deep it is.
+    """
+    stories = CommunityStory.objects.filter(status__in=FEED_STATUSES, is_public=True)
+    if scam_type:
+        stories = stories.filter(scam_type=scam_type)
+    if cursor:
+        created_at, story_id = decode_cursor(cursor)
+        stories = stories.filter(row_compare(CommunityStory, ('created_at', 'id'), '<', (created_at, story_id)))
+
+    # One extra row tells whether another page exists
+    rows = list(
+        stories.select_related('user').only(*FEED_FIELDS).order_by('-created_at', '-id')[:limit + 1]
+    )
+    page = rows[:limit]
+    return {
+        'results': [serialize_story(story) for story in page],
+        'nextCursor': encode_cursor(page[-1]) if len(rows) > limit else None,
+    }
+
+
+def get_feed_page(scam_type=None, cursor=None, limit=None):
+    """
+    fetch_page with the default-size first page of each scam type served from
+    the shared cache, so an approved or deleted story shows on every worker
+    """
+    limit = limit or settings.STORY_FEED_PAGE_SIZE
+    if cursor or limit != settings.STORY_FEED_PAGE_SIZE:
+        return fetch_page(scam_type, cursor, limit)
+
+    cache = shared_cache(settings.STORY_FEED_CACHE)
+    key = first_page_key(scam_type)
+    page = cache.get(key)
+    if page is None:
+        page = fetch_page(scam_type, None, limit)
+        cache.set(key, page, settings.STORY_FEED_CACHE_SECONDS)
+    return page
+
+
+def invalidate_first_pages():
+    """
+    Drop every cached first page. There is one per scam type plus the
+    unfiltered one. An edit can move a story between scam types.
+    """
+    scam_types = [None] + [value for value, _ in CommunityStory.SCAM_TYPE_CHOICES]
+    shared_cache(settings.STORY_FEED_CACHE).delete_many([first_page_key(scam_type) for scam_type in scam_types])
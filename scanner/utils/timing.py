@@ -0,0 +1,79 @@
+import threading
+import time
+from contextlib import contextmanager
+from .metrics import SCAN_STAGE_SECONDS
+
+
+class ScanTimer:
+    """
+    Per-request stage timings for the scan pipeline (domain extraction, TLS,
+    WHOIS, risk calculation, DB insert). Probes running in parallel record
+    into the same timer from their own threads, so timings is guarded by a
+    lock and read through as_ms, which copies it.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._closed = set()  # Stages cut off at the deadline; late results are ignored
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            if name not in self._closed:
+                self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def expire(self, names, seconds):
+        """Record stages that have not finished yet as `seconds` (the deadline) and close them"""
+        with self._lock:
+            for name in names:
+                self.timings.setdefault(name, seconds)
+                self._closed.add(name)
+
+    def timed(self, name, fn, *args):
+        """Wrap fn(*args) so its duration is recorded as stage `name`"""
+        def run():
+            with self.stage(name):
+                return fn(*args)
+        return run
+
+    async def atimed(self, name, coro):
+        with self.stage(name):
+            return await coro
+
+    def total(self):
+        return time.perf_counter() - self._start
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.timings)
+
+    def as_ms(self):
+        return {name: round(seconds * 1000, 2) for name, seconds in self.snapshot().items()}
+
+    def server_timing(self):
+        """Value for the Server-Timing response header"""
+        parts = [f'{name};dur={ms}' for name, ms in self.as_ms().items()]
+        parts.append(f'total;dur={round(self.total() * 1000, 2)}')
+        return ', '.join(parts)
+
+    def observe(self):
+        """Feed the stage durations of a finished request into the histogram"""
+        for name, seconds in self.snapshot().items():
+            SCAN_STAGE_SECONDS.observe(name, seconds)
+        SCAN_STAGE_SECONDS.observe('total', self.total())
+
+
+def with_server_timing(response, timer):
+    """Attach the Server-Timing header and record the request in the histogram"""
+    response['Server-Timing'] = timer.server_timing()
+    timer.observe()
+    return response
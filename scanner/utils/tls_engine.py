@@ -0,0 +1,224 @@
+import asyncio
+import errno
+import os
+import selectors
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .result_cache import LRUCache
+
+# Delay before racing the next address (RFC 8305 "Connection Attempt Delay")
+HAPPY_EYEBALLS_DELAY = 0.25
+
+# Small pool used only to resolve IPv4 and IPv6 at the same time
+_resolver_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dns')
+
+
+class TLSProbeEngine:
+    """
+    TLS probe shared by every SSL check in the process.
+
+    - one prebuilt SSLContext instead of create_default_context() per probe
+    - DNS answers cached for dns_ttl seconds
+    - A and AAAA lookups run in parallel; addresses are raced happy-eyeballs style
+    - separate connect and handshake timeouts, for the sync and asyncio paths alike
+
+    Sessions are never resumed: a resumed handshake carries no certificate,
+    and getpeercert() would report the one cached with the session instead of
+    what the server presents now.
+
+    connect_to=(host, port) sends every probe to that address instead of
+    <domain>:443, still with the domain as SNI (local stub servers in benchmarks).
+    """
+
+    def __init__(self, context=None, connect_timeout=3.0, handshake_timeout=5.0,
+                 dns_ttl=300, max_hosts=10000, connect_to=None):
+        self.context = context or ssl.create_default_context()
+        self.connect_to = connect_to
+        self.connect_timeout = connect_timeout
+        self.handshake_timeout = handshake_timeout
+        self.dns_ttl = dns_ttl
+        self._dns = LRUCache(max_hosts)
+
+    def resolve(self, host, port):
+        """Return [(family, sockaddr), ...] for host, IPv6 and IPv4 interleaved"""
+        key = (host, port)
+        addresses = self._dns.get(key)
+        if addresses is not None:
+            return addresses
+
+        lookups = [
+            _resolver_pool.submit(socket.getaddrinfo, host, port, family, socket.SOCK_STREAM)
+            for family in (socket.AF_INET6, socket.AF_INET)
+        ]
+        ipv6, ipv4 = [], []
+        for lookup, found in zip(lookups, (ipv6, ipv4)):
+            try:
+                found.extend((info[0], info[4]) for info in lookup.result())
+            except socket.gaierror:
+                pass
+        if not ipv6 and not ipv4:
+            raise socket.gaierror(f'Could not resolve {host}')
+
+        # Alternate families so one broken stack cannot stall the probe
+        addresses = []
+        for i in range(max(len(ipv6), len(ipv4))):
+            addresses.extend(family[i] for family in (ipv6, ipv4) if i < len(family))
+        self._dns.set(key, addresses, self.dns_ttl)
+        return addresses
+
+    async def aresolve(self, host, port):
+        """resolve for coroutines - cached answers without a thread hop"""
+        addresses = self._dns.get((host, port))
+        if addresses is not None:
+            return addresses
+        return await asyncio.get_running_loop().run_in_executor(None, self.resolve, host, port)
+
+    def address(self, host, port=443):
+        """Where a probe of host:port actually connects"""
+        return self.connect_to or (host, port)
+
+    def connect(self, addresses):
+        """Race connection attempts, starting a new one every HAPPY_EYEBALLS_DELAY"""
+        deadline = time.monotonic() + self.connect_timeout
+        pending = list(addresses)
+        attempts = {}
+        last_error = None
+        next_attempt = time.monotonic()
+
+        with selectors.DefaultSelector() as selector:
+            try:
+                while pending or attempts:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        raise socket.timeout(f'Connect timed out after {self.connect_timeout}s')
+
+                    if pending and (now >= next_attempt or not attempts):
+                        family, sockaddr = pending.pop(0)
+                        sock = socket.socket(family, socket.SOCK_STREAM)
+                        sock.setblocking(False)
+                        err = sock.connect_ex(sockaddr)
+                        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                            sock.close()
+                            last_error = OSError(err, os.strerror(err))
+                            continue
+                        selector.register(sock, selectors.EVENT_WRITE)
+                        attempts[sock] = sockaddr
+                        next_attempt = now + HAPPY_EYEBALLS_DELAY
+
+                    wake_at = min(deadline, next_attempt) if pending else deadline
+                    for key, _ in selector.select(max(0, wake_at - time.monotonic())):
+                        sock = key.fileobj
+                        selector.unregister(sock)
+                        del attempts[sock]
+                        err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                        if err == 0:
+                            sock.setblocking(True)
+                            return sock
+                        sock.close()
+                        last_error = OSError(err, os.strerror(err))
+            finally:
+                for sock in attempts:
+                    sock.close()
+
+        raise last_error or OSError('No addresses to connect to')
+
+    async def aconnect(self, addresses):
+        """connect for coroutines: a new attempt starts every HAPPY_EYEBALLS_DELAY, the first to connect wins"""
+        loop = asyncio.get_running_loop()
+
+        async def attempt(family, sockaddr, delay):
+            await asyncio.sleep(delay)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                await loop.sock_connect(sock, sockaddr)
+            except BaseException:
+                sock.close()
+                raise
+            return sock
+
+        attempts = [
+            asyncio.ensure_future(attempt(family, sockaddr, i * HAPPY_EYEBALLS_DELAY))
+            for i, (family, sockaddr) in enumerate(addresses)
+        ]
+        winner = None
+        last_error = None
+        try:
+            for next_done in asyncio.as_completed(attempts, timeout=self.connect_timeout):
+                try:
+                    winner = await next_done
+                    return winner
+                except OSError as e:
+                    last_error = e
+        except asyncio.TimeoutError:
+            raise socket.timeout(f'Connect timed out after {self.connect_timeout}s')
+        finally:
+            for task in attempts:
+                task.cancel()
+                # Attempts that also connected before being cancelled
+                if task.done() and not task.cancelled() and task.exception() is None and task.result() is not winner:
+                    task.result().close()
+        raise last_error or OSError('No addresses to connect to')
+
+    def handshake(self, host, port=443):
+        """Connect and complete a TLS handshake - returns (peer certificate, protocol)"""
+        sock = self.connect(self.resolve(*self.address(host, port)))
+        try:
+            sock.settimeout(self.handshake_timeout)
+            with self.context.wrap_socket(sock, server_hostname=host) as ssock:
+                return ssock.getpeercert(), ssock.version()
+        finally:
+            sock.close()
+
+    async def ahandshake(self, host, port=443):
+        """Async counterpart of handshake, through the same DNS cache"""
+        sock = await self.aconnect(await self.aresolve(*self.address(host, port)))
+        try:
+            _, writer = await asyncio.open_connection(
+                sock=sock, ssl=self.context, server_hostname=host,
+                ssl_handshake_timeout=self.handshake_timeout,
+            )
+        except BaseException:
+            sock.close()
+            raise
+        try:
+            ssl_object = writer.get_extra_info('ssl_object')
+            return ssl_object.getpeercert(), ssl_object.version()
+        finally:
+            writer.close()
+
+
+def parse_address(value):
+    """'host:port' -> (host, port), None for an empty setting"""
+    if not value:
+        return None
+    host, _, port = value.rpartition(':')
+    return host, int(port)
+
+
+def build_context(ca_file=None):
+    """Default verifying context, also trusting the certificates in ca_file when given"""
+    context = ssl.create_default_context()
+    if ca_file:
+        context.load_verify_locations(cafile=ca_file)
+    return context
+
+
+_engine = None
+
+
+def get_tls_engine():
+    """Return the process-wide TLS probe engine configured from settings"""
+    global _engine
+    if _engine is None:
+        from django.conf import settings
+        _engine = TLSProbeEngine(
+            connect_timeout=settings.SCAN_TLS_CONNECT_TIMEOUT,
+            handshake_timeout=settings.SCAN_TLS_HANDSHAKE_TIMEOUT,
+            dns_ttl=settings.SCAN_DNS_TTL,
+            context=build_context(settings.SCAN_TLS_CA_FILE),
+            connect_to=parse_address(settings.SCAN_TLS_CONNECT_TO),
+        )
+    return _engine
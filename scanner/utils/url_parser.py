@@ -1,4 +1,5 @@
 from urllib.parse import urlparse
+from .lexical import get_lexical_analyzer
 
 def extract_domain_from_url(url):
     """
@@ -11,11 +12,22 @@ def extract_domain_from_url(url):
         
         parsed_url = urlparse(url)
         domain = parsed_url.netloc
-        
-        # Remove www. if present
-        if domain.startswith('www.'):
-            domain = domain[4:]
-            
-        return domain
+        host = parsed_url.hostname
     except Exception as e:
-        raise ValueError(f"Invalid URL: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Invalid URL: {str(e)}")
+
+    # "http://", "https://:443" and the like have nothing to scan
+    if not host:
+        raise ValueError('Invalid URL: no host name')
+
+    # Remove www. if present
+    if domain.startswith('www.'):
+        domain = domain[4:]
+
+    return domain
+
+def registrable_domain(domain):
+    """
+    Return the registrable part of a domain (e.g. a.b.example.co.uk -> example.co.uk)
+    """
+    return get_lexical_analyzer().registrable_domain(domain)
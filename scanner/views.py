@@ -1,68 +1,433 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
 import json
-from .models import ScanResult  # Make sure this import exists
+import math
+from asgiref.sync import sync_to_async
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from .models import CommunityStory, ScanJob, ScanResult  # Make sure this import exists
 from .utils.url_parser import extract_domain_from_url
-from .utils.ssl_checker import check_ssl
-from .utils.domain_checker import get_domain_age
-from .utils.risk_calculator import calculate_risk
+from .utils.job_queue import enqueue_scan
+from .utils.export import CONTENT_TYPES, EXPORT_FORMATS, export_rows, iter_export
+from .utils.search import MIN_SCAN_TERM, search_scans, search_stories
+from .utils.story_feed import get_feed_page, serialize_story
+from .utils.rate_limit import RateLimitCostError, check_rate_limit
+from .utils.rollups import get_risk_stats, record_scans
+from .utils.reputation import get_reputation_store, lookup_reputation
+from .utils.result_cache import get_probe_cache
+from .utils.single_flight import get_single_flight, lock_stats
+from .utils.metrics import SCAN_STAGE_SECONDS, render_counter
+from .utils.scan_pipeline import (
+    build_scan_fields, is_reusable, probe_domains_async, recent_scans,
+    run_scan, run_scan_async,
+)
+from .utils.timing import ScanTimer, with_server_timing
+
+def parse_scan_request(request):
+    """Return (url, domain) from the JSON body, raising ValueError when invalid"""
+    data = json.loads(request.body)
+    url = data.get('url', '').strip()
+
+    if not url:
+        raise ValueError('URL is required')
+
+    return url, extract_domain_from_url(url)
+
+def wants_fresh_scan(request):
+    """True when ?fresh=1 forces a rescan - recent rows and the probe cache are both skipped"""
+    return request.GET.get('fresh') in ('1', 'true')
+
+def reuses_recent_scans(fresh):
+    """Whether to look for a recent ScanResult first - not for ?fresh=1 or a disabled window"""
+    return not fresh and settings.SCAN_FRESHNESS_MINUTES > 0
+
+def build_reused_response(scan_result):
+    """Response for a recent scan served from the database without probing"""
+    response_data = build_scan_response(scan_result, {}, {})
+    response_data['cached'] = True
+    response_data['message'] = 'Recent scan of this domain served from database'
+    return response_data
+
+def build_rate_limited_response(domain, retry_after):
+    """
+    Over the rate limit: the latest stored scan of the domain (any age) when
+    there is one, else a 429. Never probes and never waits.
+    """
+    latest = ScanResult.objects.filter(domain=domain).order_by('-created_at').first()
+    if latest is not None:
+        response_data = build_reused_response(latest)
+        response_data['rateLimited'] = True
+        response_data['partial'] = bool(latest.report_card.get('partial'))
+        response_data['message'] = 'Rate limit reached - latest stored scan of this domain served'
+        response = JsonResponse(response_data)
+        response['Retry-After'] = str(math.ceil(retry_after))
+        return response
+    return rate_limit_exceeded(retry_after)
+
+def rate_limit_exceeded(retry_after):
+    retry_after = math.ceil(retry_after)
+    response = JsonResponse({'error': 'Rate limit exceeded', 'retryAfter': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+def build_scan_response(scan_result, ssl_data, domain_data):
+    """Prepare response data for a saved scan"""
+    return {
+        'riskLevel': scan_result.risk_level,
+        'riskCategory': scan_result.risk_category,
+        'sslGrade': scan_result.ssl_grade,
+        'domainAge': scan_result.domain_age,
+        'domain': scan_result.domain,
+        'scanId': scan_result.id,  # Include the database ID
+        'lexicalSignals': scan_result.report_card.get('lexical', {}).get('signals', []),
+        'reputation': scan_result.report_card.get('reputation'),  # Block/allow list hit, if any
+        'partial': ssl_data.get('unknown', False) or domain_data.get('unknown', False),
+        'cached': ssl_data.get('cached', False) and domain_data.get('cached', False),
+        'message': 'Scan completed and saved to database'
+    }
 
 @csrf_exempt
 @require_POST
 def scan_url(request):
+    timer = ScanTimer()
+    try:
+        with timer.stage('extract'):
+            url, domain = parse_scan_request(request)
+
+        # Local block/allow lists give a verdict before the database or the network
+        with timer.stage('reputation'):
+            reputation = lookup_reputation(domain)
+
+        # Serve a recent scan of the same domain without any outbound I/O
+        fresh = wants_fresh_scan(request)
+        if reuses_recent_scans(fresh) and reputation is None:
+            with timer.stage('lookup'):
+                recent = recent_scans(domain).first()
+            if is_reusable(recent):
+                return with_server_timing(JsonResponse(build_reused_response(recent)), timer)
+
+        # Only requests that would probe the network are charged to the caller
+        if reputation is None:
+            with timer.stage('ratelimit'):
+                retry_after = check_rate_limit(request)
+            if retry_after:
+                return with_server_timing(build_rate_limited_response(domain, retry_after), timer)
+
+        # Perform security checks (cached or in parallel under one scan deadline)
+        # and ✅ SAVE TO DATABASE - Create ScanResult object
+        scan_result, ssl_data, domain_data = run_scan(
+            url, domain, refresh=fresh, timer=timer, reputation=reputation
+        )
+
+        return with_server_timing(
+            JsonResponse(build_scan_response(scan_result, ssl_data, domain_data)), timer
+        )
+
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': 'Internal server error: ' + str(e)}, status=500)
+
+@csrf_exempt
+@require_POST
+async def scan_url_async(request):
+    """
+    Async variant of scan_url for ASGI workers: the TLS handshake uses asyncio
+    streams and WHOIS runs on the probe pool, so one worker can keep many slow
+    scans in flight.
+    """
+    timer = ScanTimer()
+    try:
+        with timer.stage('extract'):
+            url, domain = parse_scan_request(request)
+
+        with timer.stage('reputation'):
+            reputation = lookup_reputation(domain)
+
+        fresh = wants_fresh_scan(request)
+        if reuses_recent_scans(fresh) and reputation is None:
+            with timer.stage('lookup'):
+                recent = await recent_scans(domain).afirst()
+            if is_reusable(recent):
+                return with_server_timing(JsonResponse(build_reused_response(recent)), timer)
+
+        if reputation is None:
+            with timer.stage('ratelimit'):
+                retry_after = await sync_to_async(check_rate_limit)(request)
+            if retry_after:
+                response = await sync_to_async(build_rate_limited_response)(domain, retry_after)
+                return with_server_timing(response, timer)
+
+        scan_result, ssl_data, domain_data = await run_scan_async(
+            url, domain, refresh=fresh, timer=timer, reputation=reputation
+        )
+
+        return with_server_timing(
+            JsonResponse(build_scan_response(scan_result, ssl_data, domain_data)), timer
+        )
+
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': 'Internal server error: ' + str(e)}, status=500)
+
+@csrf_exempt
+@require_POST
+async def scan_batch(request):
+    """
+    Scan a list of URLs in one request. Each unique domain is probed once,
+    all rows are saved with a single bulk_create and results keep input order.
+    """
+    timer = ScanTimer()
     try:
         data = json.loads(request.body)
-        url = data.get('url', '').strip()
-        
-        if not url:
-            return JsonResponse({'error': 'URL is required'}, status=400)
-        
-        domain = extract_domain_from_url(url)
-        
-        # Perform security checks
-        ssl_data = check_ssl(domain)
-        domain_data = get_domain_age(domain)
-        risk_level = calculate_risk(ssl_data, domain_data)
-        
-        # Determine risk category based on risk level
-        if risk_level >= 80:
-            risk_category = 'critical'
-        elif risk_level >= 60:
-            risk_category = 'high'
-        elif risk_level >= 30:
-            risk_category = 'medium'
-        else:
-            risk_category = 'low'
-        
-        # ✅ SAVE TO DATABASE - Create ScanResult object
-        scan_result = ScanResult.objects.create(
-            url=url,
-            domain=domain,
-            risk_level=risk_level,
+        urls = data.get('urls')
+
+        if not isinstance(urls, list) or not urls:
+            return JsonResponse({'error': 'A non-empty list of URLs is required'}, status=400)
+        if len(urls) > settings.SCAN_BATCH_MAX_URLS:
+            return JsonResponse({
+                'error': f'At most {settings.SCAN_BATCH_MAX_URLS} URLs per batch'
+            }, status=400)
+
+        # Normalize every URL, remembering invalid ones so output order is kept
+        items = []
+        with timer.stage('extract'):
+            for raw_url in urls:
+                url = raw_url.strip() if isinstance(raw_url, str) else ''
+                try:
+                    if not url:
+                        raise ValueError('URL is required')
+                    items.append((url, extract_domain_from_url(url), None))
+                except ValueError as e:
+                    items.append((url, None, str(e)))
+
+        # dict.fromkeys dedupes domains while keeping first-seen order
+        domains = list(dict.fromkeys(domain for _, domain, _ in items if domain))
+
+        # Listed domains get their verdict locally; only the rest are probed
+        with timer.stage('reputation'):
+            verdicts = {domain: lookup_reputation(domain) for domain in domains}
+        unlisted = [domain for domain in domains if verdicts[domain] is None]
+        if unlisted:
+            # One token per domain to probe, from the batch buckets
+            try:
+                with timer.stage('ratelimit'):
+                    retry_after = await sync_to_async(check_rate_limit)(request, len(unlisted), batch=True)
+            except RateLimitCostError as e:
+                return with_server_timing(JsonResponse({
+                    'error': f'At most {e.burst} new domains can be probed per batch',
+                    'maxProbes': e.burst,
+                }, status=400), timer)
+            if retry_after:
+                return with_server_timing(rate_limit_exceeded(retry_after), timer)
+        with timer.stage('probe'):
+            probes = await probe_domains_async(unlisted, settings.SCAN_BATCH_CONCURRENCY)
+        probes.update((domain, ({}, {})) for domain in domains if verdicts[domain] is not None)
+
+        # build_scan_fields sets domain and risk_category, since bulk_create skips save()
+        with timer.stage('risk'):
+            scan_results = [
+                ScanResult(**build_scan_fields(
+                    url, domain, *probes[domain], reputation=verdicts[domain]
+                ))
+                for url, domain, _ in items if domain
+            ]
+        with timer.stage('db'):
+            await ScanResult.objects.abulk_create(scan_results)
+            if settings.SCAN_ROLLUPS_ON_SAVE:  # bulk_create sends no post_save
+                await sync_to_async(record_scans)(scan_results)
+
+        results = []
+        saved = iter(scan_results)
+        for url, domain, error in items:
+            if error:
+                results.append({'url': url, 'error': error})
+                continue
+            result = build_scan_response(next(saved), *probes[domain])
+            result['url'] = url
+            results.append(result)
+
+        return with_server_timing(JsonResponse({
+            'results': results,
+            'count': len(results),
+            'uniqueDomains': len(domains),
+        }), timer)
+
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': 'Internal server error: ' + str(e)}, status=500)
+
+def build_job_response(job):
+    """Status of a background scan job, with the scan once it is done"""
+    response_data = {
+        'jobId': job.id,
+        'status': job.status,
+        'url': job.url,
+        'createdAt': job.created_at.isoformat(),
+    }
+    if job.status == 'done' and job.result is not None:
+        response_data['result'] = build_scan_response(job.result, {}, {})
+    elif job.status == 'failed':
+        response_data['error'] = job.error
+    return response_data
+
+@csrf_exempt
+@require_POST
+def submit_scan_job(request):
+    """Queue a scan for the background workers and return its job id right away"""
+    try:
+        url, domain = parse_scan_request(request)
+
+        # A recent verdict makes the job complete immediately
+        fresh = wants_fresh_scan(request)
+        if reuses_recent_scans(fresh):
+            recent = recent_scans(domain).first()
+            if is_reusable(recent):
+                job = ScanJob.objects.create(
+                    url=url, domain=domain, status='done', result=recent,
+                    finished_at=timezone.now()
+                )
+                return JsonResponse(build_job_response(job))
+
+        retry_after = check_rate_limit(request)
+        if retry_after:
+            return rate_limit_exceeded(retry_after)
+
+        job = enqueue_scan(url, domain, refresh=fresh)
+        return JsonResponse(build_job_response(job), status=202)
+
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': 'Internal server error: ' + str(e)}, status=500)
+
+@require_GET
+def scan_job_status(request, job_id):
+    """Poll a background scan job"""
+    job = ScanJob.objects.select_related('result').filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'error': 'Scan job not found'}, status=404)
+    return JsonResponse(build_job_response(job))
+
+@require_GET
+def cache_stats(request):
+    """Probe cache hit/miss, single-flight and reputation index counters of this process"""
+    stats = get_probe_cache().stats()
+    stats['singleFlight'] = dict(get_single_flight().stats(), dbLock=dict(lock_stats))
+    stats['reputation'] = get_reputation_store().stats()
+    return JsonResponse(stats)
+
+@require_GET
+def metrics(request):
+    """Scan pipeline metrics of this process in Prometheus text format"""
+    cache = get_probe_cache().stats()
+    flights = get_single_flight().stats()
+    lines = SCAN_STAGE_SECONDS.render()
+    lines += render_counter('scan_probe_cache_hits_total', 'Probe cache hits', cache['hits'], 'kind')
+    lines += render_counter('scan_probe_cache_misses_total', 'Probe cache misses', cache['misses'], 'kind')
+    lines += render_counter('scan_single_flight_started_total', 'Domain probes actually run', flights['started'])
+    lines += render_counter('scan_single_flight_shared_total', 'Probes saved by joining an in-flight probe', flights['shared'])
+    lines += render_counter('scan_domain_lock_total', 'Cross-process domain lock outcomes', lock_stats, 'outcome')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')
+
+@require_GET
+def risk_stats(request):
+    """Risk category counts, SSL grade distribution and top risky domains per day"""
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 366)
+        top = min(max(int(request.GET.get('top', 10)), 0), 100)
+    except ValueError:
+        return JsonResponse({'error': 'days and top must be integers'}, status=400)
+    return JsonResponse(get_risk_stats(days, top))
+
+@require_GET
+def story_feed(request):
+    """Public community stories, newest first - ?scam_type=, ?cursor= from nextCursor, ?limit="""
+    scam_type = request.GET.get('scam_type') or None
+    if scam_type and scam_type not in dict(CommunityStory.SCAM_TYPE_CHOICES):
+        return JsonResponse({'error': 'Invalid scam_type'}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', settings.STORY_FEED_PAGE_SIZE)), 1), 100)
+        page = get_feed_page(scam_type, request.GET.get('cursor'), limit)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(page)
+
+@api_view(['GET'])
+def search(request):
+    """
+    Ranked search over public community stories and, for staff, scanned URLs
+    (which can carry tokens and reset links). A phone number or URL as ?q=
+    finds every story that mentions it.
+    ?type=stories|scans narrows the search, ?limit= caps each list.
+    """
+    query = request.GET.get('q', '').strip()
+    if len(query) < 2:
+        return JsonResponse({'error': 'Query must be at least 2 characters'}, status=400)
+    search_type = request.GET.get('type', 'all')
+    if search_type == 'scans':
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Searching scanned URLs requires a staff account'}, status=403)
+        if len(query) < MIN_SCAN_TERM:
+            return JsonResponse({'error': f'Query must be at least {MIN_SCAN_TERM} characters'}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    response_data = {'query': query}
+    if search_type in ('all', 'stories'):
+        response_data['stories'] = [
+            dict(serialize_story(story), rank=rank) for story, rank in search_stories(query, limit)
+        ]
+    if search_type == 'scans' or (search_type == 'all' and request.user.is_staff and len(query) >= MIN_SCAN_TERM):
+        response_data['scans'] = [
+            {
+                'scanId': scan.id,
+                'url': scan.url,
+                'domain': scan.domain,
+                'riskLevel': scan.risk_level,
+                'riskCategory': scan.risk_category,
+                'createdAt': scan.created_at.isoformat(),
+            }
+            for scan in search_scans(query, limit)
+        ]
+    return JsonResponse(response_data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_scans(request):
+    """
+    Stream ScanResult history as NDJSON (default) or CSV (?output=csv).
+    Filters: since, until (ISO dates), risk_category, ssl_grade.
+    """
+    export_format = request.GET.get('output', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'output must be one of: {", ".join(EXPORT_FORMATS)}'}, status=400)
+
+    risk_category = request.GET.get('risk_category')
+    if risk_category and risk_category not in dict(ScanResult.RISK_CATEGORY_CHOICES):
+        return JsonResponse({'error': 'Invalid risk_category'}, status=400)
+
+    try:
+        rows = export_rows(
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
             risk_category=risk_category,
-            ssl_grade=ssl_data.get('grade', 'N/A'),
-            domain_age=domain_data.get('age', 0),
-            # Add other fields if available from your checks
-            ssl_valid=ssl_data.get('valid', False),
-            security_score=100 - risk_level,  # Inverse of risk level
-            trust_score=max(0, 100 - risk_level)  # Higher risk = lower trust
+            ssl_grade=request.GET.get('ssl_grade'),
         )
-        
-        # Prepare response data
-        response_data = {
-            'riskLevel': risk_level,
-            'riskCategory': risk_category,
-            'sslGrade': ssl_data.get('grade', 'N/A'),
-            'domainAge': domain_data.get('age', 0),
-            'domain': domain,
-            'scanId': scan_result.id,  # Include the database ID
-            'message': 'Scan completed and saved to database'
-        }
-        
-        return JsonResponse(response_data)
-        
     except ValueError as e:
         return JsonResponse({'error': str(e)}, status=400)
-    except Exception as e:
-        return JsonResponse({'error': 'Internal server error: ' + str(e)}, status=500)
\ No newline at end of file
+
+    response = StreamingHttpResponse(
+        iter_export(rows, export_format, settings.SCAN_EXPORT_CHUNK_SIZE),
+        content_type=CONTENT_TYPES[export_format],
+    )
+    filename = f'scan-results-{timezone.now():%Y%m%d-%H%M%S}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response